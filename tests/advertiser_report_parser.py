@@ -1,31 +1,34 @@
 import pandas
 import datetime
-import wirepas_gateway_client
 
 
 def push_to_fluentd(df, logger):
 
-    if args.fluentd_hostname:
+    for row in df.iterrows():
+        missing = set(row[1].inventory_target_nodes) ^ set(row[1].observed)
+
+        record = dict(
+            total_nodes=row[1].observed_total,
+            missing=missing,
+            inventory_start=datetime.datetime.utcfromtimestamp(
+                row[1].start / 1e3
+            ).isoformat("T"),
+            inventory_end=datetime.datetime.utcfromtimestamp(
+                row[1].end / 1e3
+            ).isoformat("T"),
+            elapsed=row[1].elapsed,
+        )
+        record["@timestamp"] = record["inventory_start"]
+        logger.info(record)
 
-        for row in df.iterrows():
-            missing = set(row[1].inventory_target_nodes) ^ set(row[1].observed)
 
-            record = dict(
-                total_nodes=row[1].observed_total,
-                missing=missing,
-                inventory_start=datetime.datetime.utcfromtimestamp(
-                    row[1].start / 1e3
-                ).isoformat("T"),
-                inventory_end=datetime.datetime.utcfromtimestamp(
-                    row[1].end / 1e3
-                ).isoformat("T"),
-                elapsed=row[1].elapsed,
-            )
-            record["@timestamp"] = record["inventory_start"]
-            logger.info(record)
+def read_report(filepath):
+    """ Reads the JSON lines written by kpi_adv, one run per row """
+    return pandas.read_json(filepath, lines=True)
 
 
 if __name__ == "__main__":
+    import wirepas_gateway_client
 
     stats = dict()
     args = wirepas_gateway_client.tools.parse_args()
@@ -36,8 +39,9 @@ if __name__ == "__main__":
         fluentd_hostname=args.fluentd_hostname,
     )
 
-    df = pandas.read_json(args.input)
-    stats["elapsed"] = pandas.to_numeric(df.T.elapsed).describe()
+    df = read_report(args.input)
+    stats["elapsed"] = pandas.to_numeric(df.elapsed).describe()
     print(stats)
 
-    push_to_fluentd(df.T, logger)
+    if args.fluentd_hostname:
+        push_to_fluentd(df, logger)
@@ -0,0 +1,83 @@
+import logging
+import queue
+import threading
+import types
+
+import pandas
+
+from advertiser_report_parser import push_to_fluentd, read_report
+from wirepas_backend_client.test import kpi_adv
+
+
+class RecordingLogger(object):
+    def __init__(self):
+        self.records = list()
+
+    def info(self, record):
+        self.records.append(record)
+
+
+def build_report(target_nodes, observed):
+    manager = kpi_adv.AdvertiserManager(
+        tx_queue=queue.Queue(),
+        rx_queue=queue.Queue(),
+        start_signal=threading.Event(),
+        exit_signal=threading.Event(),
+        inventory_target_nodes=target_nodes,
+        delay=0,
+        duration=10,
+        logger=logging.getLogger(__name__),
+    )
+    manager.inventory.wait()
+    for node in observed:
+        manager.inventory.add(node, [-50], [], 0)
+
+    return manager.report()
+
+
+def test_report_round_trip(tmp_path, monkeypatch):
+    """ Reports written by fetch_report are read back by the parser """
+
+    # set by kpi_adv when it runs as a script
+    monkeypatch.setattr(
+        kpi_adv, "__TEST_NAME__", "test_advertiser", raising=False
+    )
+
+    reports = queue.Queue()
+    expected = [
+        build_report({1, 2, 3}, [1, 2]),
+        build_report({1, 2, 3}, [1, 2, 3, 4]),
+    ]
+    for report in expected:
+        reports.put(dict(report))
+
+    filepath = tmp_path / "report.jsonl"
+    args = types.SimpleNamespace(output=str(filepath), output_time=False)
+    kpi_adv.fetch_report(
+        args,
+        reports,
+        timeout=0.01,
+        report_output=None,
+        number_of_runs=3,
+        exit_signal=threading.Event(),
+        logger=logging.getLogger(__name__),
+    )
+
+    df = read_report(str(filepath))
+    assert list(df.run) == [0, 1]
+    assert list(df.observed_total) == [2, 4]
+    assert pandas.to_numeric(df.elapsed).count() == 2
+
+    logger = RecordingLogger()
+    push_to_fluentd(df, logger)
+
+    assert [record["missing"] for record in logger.records] == [{3}, {4}]
+    for report, record in zip(expected, logger.records):
+        for name, key in (
+            ("inventory_start", "start"),
+            ("inventory_end", "end"),
+        ):
+            # the times are stored with millisecond precision
+            value = report[key]
+            value = value.replace(microsecond=value.microsecond // 1000 * 1000)
+            assert record[name] == value.isoformat("T")
@@ -0,0 +1,105 @@
+import math
+import random
+
+from wirepas_backend_client.management import Inventory
+
+
+# the completion checks of the original Inventory, which recomputed them
+# from the node index on every call
+def baseline_otaped_nodes(inventory):
+    otaped = set()
+    for node_address, details in inventory._index.items():
+        event = details["events"][-1]
+        target = inventory.target_otap_sequence
+        if event.get("otap_min") == target or event.get("otap_max") == target:
+            otaped.add(node_address)
+    return otaped
+
+
+def baseline_frequency(inventory):
+    frequency = dict()
+    for node in sorted(inventory._index):
+        if inventory.target_otap_sequence:
+            frequency[node] = inventory._index[node]["events"][-1]["otap_max"]
+        else:
+            frequency[node] = inventory._index[node]["count"]
+
+    for node in inventory.target_nodes:
+        frequency.setdefault(node, 0)
+    return frequency
+
+
+def baseline_is_complete(inventory):
+    if not inventory.target_nodes or inventory.target_frequency < math.inf:
+        return False
+    return (
+        inventory.nodes.issuperset(inventory.target_nodes)
+        and not inventory.target_otap_sequence
+    )
+
+
+def baseline_is_otaped(inventory):
+    if not inventory.target_nodes or inventory.target_otap_sequence is None:
+        return False
+    return baseline_otaped_nodes(inventory).issuperset(inventory.target_nodes)
+
+
+def baseline_is_frequency_reached(inventory):
+    if not inventory.target_nodes:
+        return False
+    return all(
+        value >= inventory.target_frequency
+        for node, value in baseline_frequency(inventory).items()
+        if node in inventory.target_nodes
+    )
+
+
+def assert_matches_baseline(inventory):
+    assert inventory.is_complete() == baseline_is_complete(inventory)
+    assert inventory.is_otaped() == baseline_is_otaped(inventory)
+    assert inventory.is_frequency_reached() == baseline_is_frequency_reached(
+        inventory
+    )
+    assert inventory.otaped_nodes == baseline_otaped_nodes(inventory)
+    assert inventory.frequency() == baseline_frequency(inventory)
+    assert inventory.difference() == inventory.nodes ^ inventory.target_nodes
+
+
+def advertiser_tuples(rng, count):
+    """ Returns (address, rss, otap, time) tuples, as AdvertiserMessage """
+    for timestamp in range(count):
+        rss = [rng.choice([0, -50, -70])]
+        # non zero sequences, so that every event has an otap_max
+        otap = rng.choice([[2], [3], [3], [2, 3], [1, 4]])
+        yield rng.randint(1, 8), rss, otap, timestamp
+
+
+def test_incremental_criteria_match_the_recomputed_ones():
+    """ add, remove and reset keep the criteria of the original checks """
+
+    rng = random.Random(1)
+    targets = {1, 2, 3, 4, 5}
+    settings = [
+        dict(),
+        dict(target_otap_sequence=3),
+        dict(target_frequency=4),
+        dict(target_otap_sequence=2, target_frequency=3),
+    ]
+
+    for kwargs in settings:
+        inventory = Inventory(
+            target_nodes=targets, start_delay=0, maximum_duration=10, **kwargs
+        )
+
+        for _ in range(3):
+            # wait resets the inventory between runs
+            inventory.wait()
+            assert_matches_baseline(inventory)
+
+            for advertiser in advertiser_tuples(rng, 60):
+                inventory.add(*advertiser)
+                assert_matches_baseline(inventory)
+
+                if rng.random() < 0.05:
+                    inventory.remove(rng.choice(sorted(inventory.nodes)))
+                    assert_matches_baseline(inventory)
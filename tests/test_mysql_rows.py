@@ -0,0 +1,232 @@
+import types
+
+from wirepas_backend_client.api.mysql import connectors
+from wirepas_backend_client.api.mysql.connectors import MySQL
+
+# number of parameters of a diagnostic_boot row
+BOOT_WIDTH = len(connectors.DIAGNOSTIC_BOOT_FIELDS) + 1
+
+
+class FakeCursor(object):
+    """ Records the statements and hands out ids like MySQL does """
+
+    def __init__(self, first_id=100, increment=1):
+        self.executed = list()
+        self.lastrowid = 0
+        self._next_id = first_id
+        self._increment = increment
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+        if statement.startswith(connectors.INSERT_RECEIVED_PACKETS):
+            n_rows = len(params) // 12
+            self.lastrowid = self._next_id
+            self._next_id += n_rows * self._increment
+        else:
+            # the other tables have no auto increment column
+            self.lastrowid = 0
+
+
+class FakeDatabase(object):
+    def begin(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def build_mysql(first_id=100, increment=1):
+    mysql = MySQL(
+        username="user",
+        password="password",
+        hostname="localhost",
+        database="wirepas",
+        port=3306,
+        connection_timeout=1,
+    )
+    mysql.cursor = FakeCursor(first_id, increment)
+    mysql.database = FakeDatabase()
+    mysql.id_increment = increment
+    return mysql
+
+
+def build_message(source_address, network_id=7, apdu=None):
+    return types.SimpleNamespace(
+        rx_time_ms_epoch=1000000,
+        travel_time_ms=10,
+        network_id=network_id,
+        destination_address=1,
+        source_address=source_address,
+        source_endpoint=254,
+        destination_endpoint=255,
+        qos=1,
+        data_payload=b"\x00" * 4,
+        hop_count=1,
+        apdu=apdu or dict(),
+    )
+
+
+def boot_apdu(boot_count):
+    apdu = {
+        field: index
+        for index, field in enumerate(connectors.DIAGNOSTIC_BOOT_FIELDS)
+    }
+    apdu["boot_count"] = boot_count
+    return apdu
+
+
+def executed_rows(cursor, statement):
+    """ Returns the parameters of the statement's executions """
+    return [
+        params
+        for executed, params in cursor.executed
+        if executed.startswith(statement)
+    ]
+
+
+def test_single_message_details_refer_to_their_packet():
+    """ The known_nodes upsert does not change the details packet id """
+
+    mysql = build_mysql(first_id=100)
+    message = build_message(5, apdu=boot_apdu(3))
+
+    mysql.put_to_received_packets(message)
+    mysql.put_boot_diagnostics(message)
+
+    (boot,) = executed_rows(mysql.cursor, connectors.INSERT_DIAGNOSTIC_BOOT)
+    assert boot[0] == 100
+
+
+def node_apdu(voltage, role):
+    apdu = {
+        field: index
+        for index, field in enumerate(connectors.DIAGNOSTIC_NODE_FIELDS)
+    }
+    apdu.update({"events_{}".format(position): 0 for position in range(15)})
+    apdu["events_2"] = 9
+    apdu["voltage"] = voltage
+    apdu["role"] = role
+    return apdu
+
+
+def boot_rows(messages):
+    """ Returns the batch_rows of boot diagnostics messages """
+    packets = [MySQL._received_packet_row(message) for message in messages]
+    details = list()
+    for index, message in enumerate(messages):
+        details.extend(MySQL._boot_diagnostics_rows(index, message))
+    return packets, details
+
+
+def test_put_rows_details_ids_follow_the_auto_increment():
+    """ Details rows get the id of their packet in the multi-row insert """
+
+    mysql = build_mysql(first_id=100, increment=2)
+    messages = [
+        build_message(address, apdu=boot_apdu(address))
+        for address in (5, 6, 7)
+    ]
+
+    mysql.put_rows(*boot_rows(messages))
+
+    (packets,) = executed_rows(
+        mysql.cursor, connectors.INSERT_RECEIVED_PACKETS
+    )
+    assert len(packets) == 3 * 12
+
+    (boots,) = executed_rows(mysql.cursor, connectors.INSERT_DIAGNOSTIC_BOOT)
+    ids = boots[::BOOT_WIDTH]
+    counts = boots[1::BOOT_WIDTH]
+    assert ids == (100, 102, 104)
+    assert counts == (5, 6, 7)
+
+
+def test_merge_rows_offsets_the_packet_indices():
+    """ The details of a merged batch refer to their packet in the merge """
+
+    first = boot_rows([build_message(5, apdu=boot_apdu(5))])
+    second = boot_rows(
+        [
+            build_message(6, apdu=boot_apdu(6)),
+            build_message(7, apdu=boot_apdu(7)),
+        ]
+    )
+
+    packets, details = MySQL.merge_rows([first, second])
+
+    assert [packet[5] for packet in packets] == [5, 6, 7]
+    assert [(values[0], values[1]) for _, _, values in details] == [
+        (0, 5),
+        (1, 6),
+        (2, 7),
+    ]
+
+    mysql = build_mysql(first_id=10)
+    mysql.put_rows(packets, details)
+
+    (boots,) = executed_rows(mysql.cursor, connectors.INSERT_DIAGNOSTIC_BOOT)
+    assert boots[::BOOT_WIDTH] == (10, 11, 12)
+
+
+def test_update_known_nodes_column_order():
+    """ known_nodes gets the last boot and status values of each node """
+
+    mysql = build_mysql()
+    apdu = dict(
+        boot_count=1,
+        node_role=2,
+        firmware_version=3,
+        scratchpad_sequence=4,
+        hw_magic=5,
+        stack_profile=6,
+        otap_enabled=7,
+        boot_line_number=8,
+        file_hash=9,
+        stack_trace_0=10,
+        stack_trace_1=11,
+        stack_trace_2=12,
+        cur_seq=13,
+    )
+    older = dict(apdu, boot_count=0)
+
+    details = (
+        MySQL._boot_diagnostics_rows(0, build_message(6, apdu=older))
+        + MySQL._node_diagnostics_rows(
+            0, build_message(6, apdu=node_apdu(1, 2))
+        )
+        + MySQL._boot_diagnostics_rows(1, build_message(6, apdu=apdu))
+        + MySQL._node_diagnostics_rows(
+            2, build_message(5, apdu=node_apdu(3, 4))
+        )
+    )
+    nodes = [(7, 6), (7, 6), (7, 5)]
+
+    mysql._update_known_nodes(nodes, details)
+
+    (status,) = executed_rows(
+        mysql.cursor, connectors.INSERT_KNOWN_NODES_STATUS
+    )
+    # network_address, node_address, voltage, node_role, node by node
+    assert status == (7, 5, 3, 4, 7, 6, 1, 2)
+
+    (boot,) = executed_rows(mysql.cursor, connectors.INSERT_KNOWN_NODES_BOOT)
+    # network_address, node_address, node_role, firmware_version,
+    # scratchpad_seq, hw_magic, stack_profile, boot_count, file_line_num,
+    # file_name_hash
+    assert boot == (7, 6, 2, 3, 4, 5, 6, 1, 8, 9)
+
+
+def test_schema_is_current_leaves_newer_schemas():
+    """ Only an older schema version triggers create_tables """
+
+    mysql = build_mysql()
+    for version, current in (
+        (connectors.SCHEMA_VERSION - 1, False),
+        (connectors.SCHEMA_VERSION, True),
+        (connectors.SCHEMA_VERSION + 1, True),
+    ):
+        mysql.cursor.fetchone = lambda: (version,)
+        assert mysql.schema_is_current() is current
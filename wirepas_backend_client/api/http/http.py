@@ -27,9 +27,10 @@
         Copyright 2019 Wirepas Ltd under Apache License, Version 2.0.
         See file LICENSE for full license details.
 """
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from threading import Thread
-import binascii
+from threading import Lock, Thread
+import functools
 import http.server
 import logging
 import multiprocessing
@@ -37,6 +38,8 @@ import queue
 import time
 import urllib
 
+import wirepas_messaging
+
 from wirepas_backend_client.api.mqtt import Topics
 from wirepas_backend_client.api.mqtt import MQTT_QOS_options
 from wirepas_backend_client.api.stream import StreamObserver
@@ -54,148 +57,190 @@ class App_config_keys(Enum):
     sink_item_present_key = "present"
 
 
+# Resolved once as the enum lookups are done for every sink configuration
+_K_DATA = App_config_keys.app_config_data_key.value
+_K_DIAG = App_config_keys.app_config_diag_key.value
+_K_NODE_ADDR = App_config_keys.app_config_node_address_key.value
+_K_NET_ADDR = App_config_keys.app_config_node_network_address_key.value
+_K_SEQ = App_config_keys.app_config_seq_key.value
+_K_SINK_ID = App_config_keys.app_config_sink_id_key.value
+_K_STARTED = App_config_keys.app_config_started_key.value
+_K_PRESENT = App_config_keys.sink_item_present_key.value
+_MANDATORY_CONFIG_KEYS = frozenset(
+    (_K_STARTED, _K_SEQ, _K_DIAG, _K_DATA, _K_NODE_ADDR)
+)
+
+_QOS_EXACTLY_ONCE = MQTT_QOS_options.exactly_once.value
+
+# new_config of the set_config requests sent by the start and stop commands
+_START_CONFIG = {_K_STARTED: True}
+_STOP_CONFIG = {_K_STARTED: False}
+
+# Queued on the gateway status queue to stop the status observer; it has
+# to survive pickling when the queue is a process or manager queue
+_SHUTDOWN_SENTINEL = None
+
+
 class SinkAndGatewayStatusObserver(Thread):
     """ SinkAndGatewayStatusObserver """
 
-    def __init__(self, exit_signal, gw_status_queue, logger):
+    def __init__(self, exit_signal, gw_status_queue, logger, max_batch=256):
         super(SinkAndGatewayStatusObserver, self).__init__()
         self.exit_signal = exit_signal
         self.gw_status_queue = gw_status_queue
         self.logger = logger
+        self.max_batch = max_batch
         self.gateways_and_sinks = (
             {}
         )  # This will be populated according query defined in
         # settins.yaml/mqtt_subscribe_network_id.
 
+        # gw_id -> get_configs request topic, built on first use
+        self._get_configs_topics = dict()
+
+        # Copy of gateways_and_sinks handed to the request handlers, which
+        # run in other threads, its sink node address -> (gw_id, sink_id)
+        # index and its lazily built string
+        self._lock = Lock()
+        self._snapshot = dict()
+        self._snapshot_index = dict()
+        self._snapshot_repr = None
+
         # pylint: disable=locally-disabled, too-many-nested-blocks,
         # too-many-branches
 
     def run(self):
-        while not self.exit_signal.is_set():
+        running = True
+        while running:
+            # Http server does not subscribe MQTT configuration. It is
+            # done by caller of http. Caller subscribes certain network
+            # all gateways.
+            status_msg = self.gw_status_queue.get(block=True)
+            if status_msg is _SHUTDOWN_SENTINEL:
+                break
+
+            # Drains the backlog keeping only the latest status of each
+            # gateway, as every status carries the full sink configuration.
+            batch = {status_msg["gw_id"]: status_msg}
             try:
-                # Http server does not subscribe MQTT configuration. It is
-                # done by caller of http. Caller subscribes certain network
-                # all gateways.
-
-                status_msg = self.gw_status_queue.get(block=True, timeout=60)
-                self.logger.info("HTTP status_msg={}".format(status_msg))
-                # New status of gateway received.
-                if status_msg["gw_id"] not in self.gateways_and_sinks:
-                    # New gateway detected
-                    self.gateways_and_sinks[status_msg["gw_id"]] = {}
-
-                # Initially mark all sinks of this gateway as not present
-                for sink_id, sink in self.gateways_and_sinks[
-                    status_msg["gw_id"]
-                ].items():
-                    sink[App_config_keys.sink_item_present_key.value] = False
-
-                for config in status_msg["configs"]:
-
-                    # Check that mandatory field sink_id is present in message
-                    if App_config_keys.app_config_sink_id_key.value in config:
-
-                        if (
-                            config[
-                                App_config_keys.app_config_sink_id_key.value
-                            ]
-                            not in self.gateways_and_sinks[status_msg["gw_id"]]
-                        ):
-                            # New sink detected
-                            self.gateways_and_sinks[status_msg["gw_id"]][
-                                config[
-                                    App_config_keys.app_config_sink_id_key.value
-                                ]
-                            ] = {}
-
-                        sink = self.gateways_and_sinks[status_msg["gw_id"]][
-                            config[
-                                App_config_keys.app_config_sink_id_key.value
-                            ]
-                        ]
-
-                        if (
-                            App_config_keys.app_config_started_key.value
-                            in config
-                            and App_config_keys.app_config_seq_key.value
-                            in config
-                            and App_config_keys.app_config_diag_key.value
-                            in config
-                            and App_config_keys.app_config_data_key.value
-                            in config
-                            and App_config_keys.app_config_node_address_key.value
-                            in config
-                        ):
-                            # All mandatory fields are present
-
-                            sink[
-                                App_config_keys.app_config_started_key.value
-                            ] = config[
-                                App_config_keys.app_config_started_key.value
-                            ]
-                            sink[
-                                App_config_keys.app_config_seq_key.value
-                            ] = config[
-                                App_config_keys.app_config_seq_key.value
-                            ]
-                            sink[
-                                App_config_keys.app_config_diag_key.value
-                            ] = config[
-                                App_config_keys.app_config_diag_key.value
-                            ]
-                            sink[
-                                App_config_keys.app_config_data_key.value
-                            ] = config[
-                                App_config_keys.app_config_data_key.value
-                            ]
-                            sink[
-                                App_config_keys.app_config_node_address_key.value
-                            ] = config[
-                                App_config_keys.app_config_node_address_key.value
-                            ]
-                            sink[
-                                App_config_keys.sink_item_present_key.value
-                            ] = True
-                        else:
-                            # There are missing fields.
-                            self.handle_missing_fields(status_msg)
+                for _ in range(1, self.max_batch):
+                    status_msg = self.gw_status_queue.get_nowait()
+                    if status_msg is _SHUTDOWN_SENTINEL:
+                        running = False
+                        break
+                    batch[status_msg["gw_id"]] = status_msg
+            except queue.Empty:
+                pass
 
-                            self.check_and_refresh_sink(sink)
+            for status_msg in batch.values():
+                self.update_gateway(status_msg)
 
-                # Remove those sinks that are not present in this gateway
-                # Cannot delete sink while iterating gateways_and_sinks dict,
-                # thus create separate list for sinks to be deleted.
-                self.remove_inactive_sinks(status_msg)
+            self.publish_snapshot()
 
-            except queue.Empty:
-                self.logger.info("HTTP status_msg receiver running")
-
-    def remove_inactive_sinks(self, status_msg):
-        delete = []
-        for sink_id, sink in self.gateways_and_sinks[
-            status_msg["gw_id"]
-        ].items():
-            if not sink[App_config_keys.sink_item_present_key.value]:
-                delete.append(sink_id)
-                self.logger.warning(
-                    "sink {}/{} is removed".format(
-                        status_msg["gw_id"], sink_id
-                    )
+    def publish_snapshot(self):
+        """ Replaces the copy of gateways_and_sinks seen by the handlers """
+        snapshot = {
+            gw_id: {sink_id: dict(sink) for sink_id, sink in sinks.items()}
+            for gw_id, sinks in self.gateways_and_sinks.items()
+        }
+        index = {
+            sink[_K_NODE_ADDR]: (gw_id, sink_id)
+            for gw_id, sinks in snapshot.items()
+            for sink_id, sink in sinks.items()
+            if _K_NODE_ADDR in sink
+        }
+        with self._lock:
+            self._snapshot = snapshot
+            self._snapshot_index = index
+            self._snapshot_repr = None
+
+    def snapshot(self) -> dict:
+        """ Returns the latest copy of gateways_and_sinks """
+        with self._lock:
+            return self._snapshot
+
+    def snapshot_and_index(self) -> tuple:
+        """
+        Returns the latest copy of gateways_and_sinks along with the
+        index of its sinks by node address
+        """
+        with self._lock:
+            return self._snapshot, self._snapshot_index
+
+    def snapshot_repr(self) -> str:
+        """ Returns the string of the latest copy of gateways_and_sinks """
+        with self._lock:
+            if self._snapshot_repr is None:
+                self._snapshot_repr = str(self._snapshot)
+            return self._snapshot_repr
+
+    def update_gateway(self, status_msg):
+        """ Reconciles the known sinks with a gateway status message """
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("HTTP status_msg={}".format(status_msg))
+
+        # New status of gateway received.
+        gw_id = status_msg["gw_id"]
+        sinks = self.gateways_and_sinks.setdefault(gw_id, {})
+        present = set()
+
+        for config in status_msg["configs"]:
+
+            # Check that mandatory field sink_id is present in message
+            if _K_SINK_ID not in config:
+                continue
+
+            sink_id = config[_K_SINK_ID]
+            sink = sinks.setdefault(sink_id, {})
+
+            if _MANDATORY_CONFIG_KEYS <= config.keys():
+                # All mandatory fields are present
+                sink.update(
+                    {key: config[key] for key in _MANDATORY_CONFIG_KEYS}
                 )
-        # And delete those sinks in separate loop.
-        for i in delete:
-            del self.gateways_and_sinks[status_msg["gw_id"]][i]
-        self.logger.info(
-            "HTTP Server gateways_and_sinks={}".format(self.gateways_and_sinks)
-        )
+                sink[_K_PRESENT] = True
+                present.add(sink_id)
+            else:
+                # There are missing fields.
+                self.handle_missing_fields(status_msg)
 
-    def check_and_refresh_sink(self, sink):
-        if "started" in sink:
-            # Sink has been present before, rely on old values
-            # and keep this sink in the configuration.
-            sink[App_config_keys.sink_item_present_key.value] = True
-        else:
-            sink[App_config_keys.sink_item_present_key.value] = False
+                if _K_STARTED in sink:
+                    # Sink has been present before, rely on old values
+                    # and keep this sink in the configuration.
+                    present.add(sink_id)
+
+        # Remove those sinks that are not present in this gateway
+        for sink_id in sinks.keys() - present:
+            self.logger.warning("sink {}/{} is removed".format(gw_id, sink_id))
+            del sinks[sink_id]
+
+        if not sinks:
+            self._get_configs_topics.pop(gw_id, None)
+
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "HTTP Server gateways_and_sinks={}".format(
+                    self.gateways_and_sinks
+                )
+            )
+
+    def get_configs_request(self, gw_id, mqtt_topics) -> dict:
+        """
+        Returns a get_configs request message for a gateway
+
+        Only the topic is cached, each message gets its own request id.
+        """
+        try:
+            topic = self._get_configs_topics[gw_id]
+        except KeyError:
+            topic = self._get_configs_topics.setdefault(
+                gw_id, mqtt_topics.request("get_configs", gw_id=gw_id)
+            )
+
+        return dict(
+            topic=topic,
+            data=wirepas_messaging.gateway.api.GetConfigsRequest(gw_id=gw_id),
+        )
 
     def handle_missing_fields(self, status_msg):
         self.logger.warning(
@@ -220,7 +265,12 @@ class HTTPSettings(Settings):
 
 
 class ConnectionServer(http.server.ThreadingHTTPServer):
-    """ ConnectionServer """
+    """
+    ConnectionServer
+
+    Serves each request in its own thread or, when max_workers is given,
+    in a bounded pool of threads.
+    """
 
     # pylint: disable=locally-disabled, too-many-arguments
 
@@ -238,27 +288,46 @@ class ConnectionServer(http.server.ThreadingHTTPServer):
         logger=None,
         http_tx_queue=None,
         status_observer=None,
+        max_workers=None,
     ):
         self.logger = logger or logging.getLogger(__name__)
         self.http_tx_queue = http_tx_queue
         self.status_observer = status_observer
 
+        # Shared by the request handlers, which are created per request
+        self.mqtt_topics = Topics()
+        self.set_config_request = functools.partial(
+            self.mqtt_topics.request_message, "set_config"
+        )
+        self.debug_comms = False  # if true communication details are logged
+        self.http_api_test_mode = False  # When on, does not send MQTT messages
+
+        if max_workers:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="http"
+            )
+        else:
+            self._executor = None
+
         super(ConnectionServer, self).__init__(
             server_address, RequestHandlerClass, bind_and_activate
         )
 
-    def get_request(self):
-        """Get the request and client address from the socket.
-
-        May be overridden.
+    def process_request(self, request, client_address):
+        """ Hands the request to the worker pool when there is one """
+        if self._executor is None:
+            super(ConnectionServer, self).process_request(
+                request, client_address
+            )
+        else:
+            self._executor.submit(
+                self.process_request_thread, request, client_address
+            )
 
-        """
-        try:
-            value = self.socket.accept()
-        except Exception as err:
-            print("socket accept exception: {}".format(err))
-            value = None
-        return value
+    def server_close(self):
+        super(ConnectionServer, self).server_close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
 
 
 class HTTPObserver(StreamObserver):
@@ -283,6 +352,7 @@ class HTTPObserver(StreamObserver):
         close_connection: bool = False,
         request_queue_size: int = 1000,
         allow_reuse_address: bool = True,
+        max_workers: int = None,
         logger=None,
     ) -> "HTTPObserver":
         super(HTTPObserver, self).__init__(
@@ -313,6 +383,7 @@ class HTTPObserver(StreamObserver):
                     logger=self.logger,
                     http_tx_queue=self.http_tx_queue,
                     status_observer=self.status_observer,
+                    max_workers=max_workers,
                 )
 
                 self.httpd.request_wait_timeout = request_wait_timeout
@@ -336,13 +407,12 @@ class HTTPObserver(StreamObserver):
     def run(self):
         """ main loop: starts status observer thread """
         self.status_observer.start()
+        Thread(target=self._kill_on_exit, daemon=True).start()
 
         # Run until killed.
         try:
-            while not self.exit_signal.is_set():
-                # Handle a http request.
-                self.logger.info("Waiting for next request")
-                self.httpd.handle_request()
+            self.logger.info("Waiting for requests")
+            self.httpd.serve_forever(poll_interval=0.5)
         except Exception as err:
             self.logger.exception(err)
 
@@ -350,14 +420,18 @@ class HTTPObserver(StreamObserver):
         self.logger.info("HTTP Control server killed")
         self.status_observer.join()
 
+    def _kill_on_exit(self):
+        """ Stops the status observer and the server on exit signal """
+        self.exit_signal.wait()
+        self.gw_status_queue.put(_SHUTDOWN_SENTINEL)
+        self.kill()
+
     def kill(self):
         """Kill the gateway thread.
         """
 
-        # Send a dummy request to let the handle_request to proceed.
-        urllib.request.urlopen(
-            "http://{}:{}".format(self.hostname, self.port)
-        ).read()
+        # Stops serve_forever, must not be called from the serving thread.
+        self.httpd.shutdown()
 
 
 class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
@@ -386,6 +460,28 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         http_response_ok = 200
         http_response_code_unknown_command = 500
 
+    # Handlers of the commands that are sent to every known sink
+    _SINK_COMMAND_HANDLERS = {
+        HTTP_server_commands.start.value: "_handle_start_command",
+        HTTP_server_commands.stop.value: "_handle_stop_command",
+        HTTP_server_commands.set_config.value: "_handle_setconfig_command",
+        HTTP_server_commands.get_info.value: "_handle_info_command",
+    }
+
+    # Resolved once as they are used to build every response
+    _F_PATH = HTTP_response_fields.path.value
+    _F_PARAMS = HTTP_response_fields.params.value
+    _F_GW_SINKS = HTTP_response_fields.gw_and_sinks.value
+    _F_COMMAND = HTTP_response_fields.command.value
+    _F_TEXT = HTTP_response_fields.text.value
+    _F_CODE = HTTP_response_fields.code.value
+    _CMD_DATA_TX = HTTP_server_commands.data_tx.value
+    _CMD_INFO = HTTP_server_commands.get_info.value
+    _CODE_OK = HTTP_server_response_codes.http_response_ok.value
+    _CODE_UNKNOWN_COMMAND = (
+        HTTP_server_response_codes.http_response_code_unknown_command.value
+    )
+
     # pylint: disable=locally-disabled, too-many-arguments, broad-except,
     # unused-argument, invalid-name
     # pylint: disable=locally-disabled, too-many-statements, too-many-locals,
@@ -396,10 +492,10 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         self.logger = server.logger or logging.getLogger(__name__)
         self.http_tx_queue = server.http_tx_queue
         self.status_observer = server.status_observer
-        self.mqtt_topics = Topics()
-
-        self.debug_comms = False  # if true communication details are logged
-        self.http_api_test_mode = False  # When on, does not send MQTT messages
+        self.mqtt_topics = server.mqtt_topics
+        self.set_config_request = server.set_config_request
+        self.debug_comms = server.debug_comms
+        self.http_api_test_mode = server.http_api_test_mode
 
         super(wbcHTTPRequestHandler, self).__init__(
             request, client_address, server
@@ -422,16 +518,15 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
         # Parse into commands and parameters
         slitted = urllib.parse.urlsplit(self.path)
-        params = dict(
-            urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query)
-        )
-        try:
-            command = slitted.path.split("/")[1]
-        except KeyError:
-            command = __default_command
+        params = dict(urllib.parse.parse_qsl(slitted.query))
 
-        if command == "":
+        # Only the first path segment is the command
+        parts = slitted.path.split("/", 2)
+        if len(parts) > 1 and parts[1]:
+            command = parts[1]
+        else:
             command = __default_command
+
         if self.debug_comms is True:
             self.logger.info(
                 dict(
@@ -440,9 +535,7 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                     path=self.path,
                     params=str(params),
                     command=command,
-                    gateways_and_sinks=str(
-                        self.status_observer.gateways_and_sinks
-                    ),
+                    gateways_and_sinks=self.status_observer.snapshot_repr(),
                 )
             )
 
@@ -465,123 +558,72 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         # By default assume that gateway configuration does not need
         # refreshing after command is executed
         refresh = False
-        response = dict()
+        response = {}
 
         # Create HTTP response header
-        response[self.HTTP_response_fields.path.value] = self.path
-        response[self.HTTP_response_fields.params.value] = str(params)
-        response[self.HTTP_response_fields.gw_and_sinks.value] = str(
-            self.status_observer.gateways_and_sinks
-        )
-        response[self.HTTP_response_fields.command.value] = command
+        response[self._F_PATH] = self.path
+        if self.debug_comms is True or command == self._CMD_INFO:
+            # Only info responses and communication logs show these
+            response[self._F_PARAMS] = str(params)
+            response[self._F_GW_SINKS] = self.status_observer.snapshot_repr()
+        response[self._F_COMMAND] = command
 
         if len(command) > 0:
 
             self.logger.info("HTTP command '%s' received", command)
 
-            response[self.HTTP_response_fields.text.value] = f"{command} ok!"
-            response[
-                self.HTTP_response_fields.code.value
-            ] = self.HTTP_server_response_codes.http_response_ok.value
+            response[self._F_TEXT] = f"{command} ok!"
+            response[self._F_CODE] = self._CODE_OK
 
-            config_messages = list()
-            messages = list()
+            config_messages = {}
+            messages = []
 
             # Go through all gateways and sinks that are currently known
-            gateways_and_sinks = self.status_observer.gateways_and_sinks
-            for gateway_id, sinks in gateways_and_sinks.items():
-
-                # Sends the command towards all the discovered sinks
-                for sink_id, sink in sinks.items():
+            (
+                gateways_and_sinks,
+                sink_index,
+            ) = self.status_observer.snapshot_and_index()
+
+            if command == self._CMD_DATA_TX:
+                # Handle transmit request, parsed once for all the sinks.
+                command_was_ok, messages = self._handle_datatx_command(
+                    response, params, gateways_and_sinks, sink_index
+                )
+                if command_was_ok is not True:
+                    self.logger.error(
+                        "HTTP command parsing (%s) failed", command
+                    )
+            elif command not in self._SINK_COMMAND_HANDLERS:
+                self._handle_unknown_command(response)
+            else:
+                handler = getattr(self, self._SINK_COMMAND_HANDLERS[command])
+                for gateway_id, sinks in gateways_and_sinks.items():
 
-                    command_was_ok = False
+                    # Sends the command towards all the discovered sinks
+                    for sink_id, sink in sinks.items():
 
-                    if command == self.HTTP_server_commands.data_tx.value:
-                        # Handle transmit request.
-                        (
-                            command_was_ok,
-                            new_messages,
-                        ) = self._handle_datatx_command(
+                        (command_was_ok, refresh, new_messages) = handler(
                             gateway_id,
-                            refresh,
-                            response,
-                            sink,
                             sink_id,
-                            command,
-                            params,
-                            gateways_and_sinks,
-                        )
-                        if command_was_ok is not True:
-                            break
-                        else:
-                            if len(new_messages) > 0:
-                                for msg in new_messages:
-                                    messages.append(msg)
-
-                    elif command == self.HTTP_server_commands.start.value:
-                        (
-                            command_was_ok,
-                            refresh,
-                            new_messages,
-                        ) = self._handle_start_command(
-                            gateway_id, refresh, sink_id
-                        )
-                        if len(new_messages) > 0:
-                            for msg in new_messages:
-                                messages.append(msg)
-                    elif command == self.HTTP_server_commands.stop.value:
-                        (
-                            command_was_ok,
-                            refresh,
-                            new_messages,
-                        ) = self._handle_stop_command(
-                            gateway_id, refresh, sink_id
-                        )
-                        if len(new_messages) > 0:
-                            for msg in new_messages:
-                                messages.append(msg)
-                    elif command == self.HTTP_server_commands.set_config.value:
-                        (
-                            command_was_ok,
-                            refresh,
-                            new_messages,
-                        ) = self._handle_setconfig_command(
-                            gateway_id, params, refresh, sink, sink_id
-                        )
-                        if len(new_messages) > 0:
-                            for msg in new_messages:
-                                messages.append(msg)
-                    elif command == self.HTTP_server_commands.get_info.value:
-                        (
-                            command_was_ok,
-                            refresh,
-                            new_messages,
-                        ) = self._handle_info_command(
-                            command,
-                            gateway_id,
+                            sink,
                             refresh,
+                            params,
                             response,
-                            sink,
-                            sink_id,
                         )
-                        if len(new_messages) > 0:
-                            for msg in new_messages:
-                                messages.append(msg)
-                    else:
-                        self._handle_unknown_command(response)
-                        break
-                    # Renews information about remote gateways
-                    if command_was_ok is True:
+                        messages.extend(new_messages)
 
-                        if refresh:
-                            refresh = False
-                            self._send_get_config_request_to_gateways(
-                                gateway_id, config_messages
+                        # Renews information about remote gateways
+                        if command_was_ok is True:
+
+                            if refresh:
+                                refresh = False
+                                self._send_get_config_request_to_gateways(
+                                    gateway_id, config_messages
+                                )
+                        else:
+                            self.logger.error(
+                                "HTTP command parsing (%s) failed", command
                             )
-                    else:
-                        self.logger.error(
-                            "HTTP command parsing (%s) failed", command
-                        )
 
             # sends all messages
             if self.http_api_test_mode is False:
@@ -594,7 +636,7 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                     self.logger.info(
                         "Send %d MQTT config messages", len(config_messages)
                     )
-                    self._send_messages_to_mqtt(config_messages)
+                    self._send_messages_to_mqtt(config_messages.values())
             else:
                 self.logger.error(
                     "HTTP API test test mode. " "Not sending MQTT messages."
@@ -602,10 +644,7 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         else:
             self._handle_empty_request(response)
 
-        if (
-            response[self.HTTP_response_fields.code.value]
-            != self.HTTP_server_response_codes.http_response_ok.value
-        ):
+        if response[self._F_CODE] != self._CODE_OK:
             self.logger.error(response)
         else:
             self.logger.info("HTTP command ok")
@@ -618,8 +657,7 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def _send_http_response(self, response):
         self.send_response(
-            code=response[self.HTTP_response_fields.code.value],
-            message=response[self.HTTP_response_fields.text.value],
+            code=response[self._F_CODE], message=response[self._F_TEXT],
         )
         self.end_headers()
 
@@ -627,70 +665,47 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
         self.logger.error("HTTP request was empty")
 
-        response[self.HTTP_response_fields.text.value] = "Error: empty request"
-        response[
-            self.HTTP_response_fields.code.value
-        ] = (
-            self.HTTP_server_response_codes.http_response_code_unknown_command.value
-        )
+        response[self._F_TEXT] = "Error: empty request"
+        response[self._F_CODE] = self._CODE_UNKNOWN_COMMAND
 
     def _send_get_config_request_to_gateways(self, gateway_id, messages):
-        message = self.mqtt_topics.request_message(
-            "get_configs", **dict(gw_id=gateway_id)
-        )
-        messages.append(message)
+        """ Adds the gateway's get_configs request, once per gateway """
+        if gateway_id not in messages:
+            messages[gateway_id] = self.status_observer.get_configs_request(
+                gateway_id, self.mqtt_topics
+            )
 
     def _send_messages_to_mqtt(self, messages):
+        """ Queues the messages towards MQTT as a single entry """
+        batch = []
         for message in messages:
             if len(message) > 0:
                 if self.debug_comms is True:
                     self.logger.info({message["topic"]: str(message["data"])})
-                self.http_tx_queue.put(message)
+                batch.append(message)
             else:
                 self.logger.error("MQTT message size is 0")
 
+        if batch:
+            self.http_tx_queue.put(batch)
+
     def _handle_unknown_command(self, response):
-        response[
-            self.HTTP_response_fields.code.value
-        ] = (
-            self.HTTP_server_response_codes.http_response_code_unknown_command.value
-        )
+        response[self._F_CODE] = self._CODE_UNKNOWN_COMMAND
         self.logger.error("HTTP request command was unknown")
-        response[self.HTTP_response_fields.text.value] = "Unknown command"
-
-    def _find_sink(self, sink_node_address: int, gateways: dict):
-
-        sink_node_address_belongs_network = False
-        for gateway_id, sinks in gateways.items():
-            # Sends the command towards all the discovered sinks
-            for sink_id, sink in sinks.items():
-                if (
-                    sink[App_config_keys.app_config_node_address_key.value]
-                    == sink_node_address
-                ):
-                    sink_node_address_belongs_network = True
-                    break
-            if sink_node_address_belongs_network is True:
-                break
-
-        return sink_node_address_belongs_network
+        response[self._F_TEXT] = "Unknown command"
 
     def _handle_datatx_command(
-        self,
-        gateway_id,
-        refresh,
-        response,
-        sink,
-        sink_id,
-        command,
-        params,
-        gateways: dict,
+        self, response, params, gateways: dict, sink_index: dict
     ):
+        """
+        Builds the send_data messages requested by a datatx command
+
+        sink_index maps the node addresses of the sinks of gateways to
+        their (gw_id, sink_id).
+        """
 
         command_was_ok: bool = True
-        command_parse_was_ok: bool = False
-        newMessages = list()
-        message = None
+        newMessages = []
 
         try:
             # When sending message to certain gateway/sink on network we need
@@ -701,195 +716,168 @@ class wbcHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             # QOS passed by HTTP request (int(params["qos"])) is not used
             # from now on. MQTT QOS is fixed to
             # MQTT_QOS_options.exactly_once.value
-            qos = MQTT_QOS_options.exactly_once.value
+            qos = _QOS_EXACTLY_ONCE
 
-            payload = binascii.unhexlify(params["payload"])
-            command_parse_was_ok = True
+            payload = bytes.fromhex(params["payload"])
         except KeyError as error:
-            response[
-                self.HTTP_response_fields.code.value
-            ] = (
-                self.HTTP_server_response_codes.http_response_code_unknown_command.value
-            )
-            response[
-                self.HTTP_response_fields.text
-            ] = f"Missing field: {error}"
+            response[self._F_CODE] = self._CODE_UNKNOWN_COMMAND
+            response[self._F_TEXT] = f"Missing field: {error}"
             command_was_ok = False
+            return command_was_ok, newMessages
         except Exception as error:
-            response[
-                self.HTTP_response_fields.code.value
-            ] = (
-                self.HTTP_server_response_codes.http_response_code_unknown_command.value
-            )
-            response[
-                self.HTTP_response_fields.text
-            ] = f"Unknown error: {error}"
+            response[self._F_CODE] = self._CODE_UNKNOWN_COMMAND
+            response[self._F_TEXT] = f"Unknown error: {error}"
             command_was_ok = False
+            return command_was_ok, newMessages
 
-        if command_parse_was_ok is True:
-            try:
-                is_unack_csma_ca = params["fast"] in ["true", "1", "yes", "y"]
-            except KeyError:
-                is_unack_csma_ca = False
-
-            try:
-                hop_limit = int(params["hoplimit"])
-            except KeyError:
-                hop_limit = 0
-
-            try:
-                count = int(params["count"])
-            except KeyError:
-                count = 1
+        try:
+            is_unack_csma_ca = params["fast"] in ["true", "1", "yes", "y"]
+        except KeyError:
+            is_unack_csma_ca = False
 
-            # Expected behavior:
-            # (1) If destination_node_address is any of gateway sink addresses,
-            # send only to desired sink.
+        try:
+            hop_limit = int(params["hoplimit"])
+        except KeyError:
+            hop_limit = 0
 
-            # (2) If destination_node_address is not any of gateway sink
-            # addresses, then send this to all sinks of gateways belonging
-            # to this network
+        try:
+            count = int(params["count"])
+        except KeyError:
+            count = 1
 
-            # Assumptions
-            # (1) each sink node address is unique to network
+        # Expected behavior:
+        # (1) If destination_node_address is any of gateway sink addresses,
+        # send only to desired sink.
 
-            send_message_to_sink: bool = False
+        # (2) If destination_node_address is not any of gateway sink
+        # addresses, then send this to all sinks of gateways belonging
+        # to this network
 
-            if self._find_sink(destination_node_address, gateways):
-                if (
-                    sink[App_config_keys.app_config_node_address_key.value]
-                    == destination_node_address
-                ):
-                    # send only addressed sink
-                    send_message_to_sink = True
-                    if self.debug_comms is True:
-                        self.logger.info("Node address is sink address")
+        # Assumptions
+        # (1) each sink node address is unique to network
 
-            else:
-                # send to all sinks on network
-                send_message_to_sink = True
+        target = sink_index.get(destination_node_address)
+        if target is not None:
+            # send only addressed sink
+            targets = (target,)
+            if self.debug_comms is True:
+                self.logger.info("Node address is sink address")
+        else:
+            # send to all sinks on network
+            targets = [
+                (gateway_id, sink_id)
+                for gateway_id, sinks in gateways.items()
+                for sink_id in sinks
+            ]
 
-            if send_message_to_sink is True:
-                # sends a or multiple messages according to the count
-                # parameter in the request
+        for gateway_id, sink_id in targets:
 
-                while count:
+            if self.debug_comms is True:
+                self.logger.info(
+                    "Create %s message(s) to be sent via %s/%s to "
+                    "nodeaddress=%s dst ep=%s payload=%s",
+                    count,
+                    gateway_id,
+                    sink_id,
+                    destination_node_address,
+                    dst_ep,
+                    payload.hex(),
+                )
 
-                    if self.debug_comms is True:
-                        self.logger.info(
-                            "Create message to be sent via %s/%s to "
-                            "nodeaddress=%s dst ep=%s payload=%s",
-                            gateway_id,
-                            sink_id,
-                            destination_node_address,
-                            dst_ep,
-                            binascii.hexlify(payload),
-                        )
+            request = dict(
+                sink_id=sink_id,
+                gw_id=gateway_id,
+                dest_add=destination_node_address,
+                src_ep=src_ep,
+                dst_ep=dst_ep,
+                qos=qos,
+                payload=payload,
+                is_unack_csma_ca=is_unack_csma_ca,
+                hop_limit=hop_limit,
+            )
 
-                    count -= 1
-                    message = self.mqtt_topics.request_message(
-                        "send_data",
-                        **dict(
-                            sink_id=sink_id,
-                            gw_id=gateway_id,
-                            dest_add=destination_node_address,
-                            src_ep=src_ep,
-                            dst_ep=dst_ep,
-                            qos=qos,
-                            payload=payload,
-                            is_unack_csma_ca=is_unack_csma_ca,
-                            hop_limit=hop_limit,
-                        ),
-                    )
-                    newMessages.append(message)
+            # sends a or multiple messages according to the count
+            # parameter in the request, each with its own request id
+            for _ in range(count):
+                newMessages.append(
+                    self.mqtt_topics.request_message("send_data", **request)
+                )
 
         return command_was_ok, newMessages
 
     def _handle_info_command(
-        self, command, gateway_id, refresh, response, sink, sink_id
+        self, gateway_id, sink_id, sink, refresh, params, response
     ):
 
         command_was_ok = True
         refresh = True
-        newMessages = list()
+        newMessages = ()
 
-        response[self.HTTP_response_fields.command.value] = command
         # Add rest of fields
         response["gateway"] = gateway_id
         response["sink"] = sink_id
-        response["started"] = sink[
-            App_config_keys.app_config_started_key.value
-        ]
-        response["app_config_seq"] = str(
-            sink[App_config_keys.app_config_seq_key.value]
-        )
-        response["app_config_diag"] = str(
-            sink[App_config_keys.app_config_diag_key.value]
-        )
-        response["app_config_data"] = str(
-            sink[App_config_keys.app_config_data_key.value]
-        )
+        response["started"] = sink[_K_STARTED]
+        response["app_config_seq"] = str(sink[_K_SEQ])
+        response["app_config_diag"] = str(sink[_K_DIAG])
+        response["app_config_data"] = str(sink[_K_DATA])
 
         return command_was_ok, refresh, newMessages
 
     def _handle_setconfig_command(
-        self, gateway_id, params, refresh, sink, sink_id
+        self, gateway_id, sink_id, sink, refresh, params, response
     ):
 
         command_was_ok = True
         refresh = True
-        newMessages = list()
 
-        try:
-            seq = int(params["seq"])
-        except KeyError:
-            if sink[App_config_keys.app_config_seq_key.value] == 254:
-                seq = 1
-            else:
-                seq = sink[App_config_keys.app_config_seq_key.value] + 1
-        try:
-            diag = int(params["diag"])
-        except KeyError:
-            diag = sink[App_config_keys.app_config_diag_key.value]
-        try:
-            data = bytes.fromhex(params["data"])
-        except KeyError:
-            data = sink[App_config_keys.app_config_data_key.value]
-        new_config = dict(
-            app_config_diag=diag, app_config_data=data, app_config_seq=seq
-        )
-        message = self.mqtt_topics.request_message(
-            "set_config",
-            **dict(sink_id=sink_id, gw_id=gateway_id, new_config=new_config),
-        )
-        newMessages.append(message)
-        return command_was_ok, refresh, newMessages
+        seq = params.get("seq")
+        if seq is not None:
+            seq = int(seq)
+        elif sink[_K_SEQ] == 254:
+            seq = 1
+        else:
+            seq = sink[_K_SEQ] + 1
 
-    def _handle_stop_command(self, gateway_id, refresh, sink_id):
+        diag = params.get("diag")
+        if diag is not None:
+            diag = int(diag)
+        else:
+            diag = sink[_K_DIAG]
 
-        command_was_ok = True
-        refresh = True
-        newMessages = list()
+        data = params.get("data")
+        if data is not None:
+            data = bytes.fromhex(data)
+        else:
+            data = sink[_K_DATA]
 
-        new_config = dict(started=False)
-        message = self.mqtt_topics.request_message(
-            "set_config",
-            **dict(sink_id=sink_id, gw_id=gateway_id, new_config=new_config),
+        new_config = {
+            "app_config_diag": diag,
+            "app_config_data": data,
+            "app_config_seq": seq,
+        }
+        message = self.set_config_request(
+            sink_id=sink_id, gw_id=gateway_id, new_config=new_config
         )
-        newMessages.append(message)
-
+        newMessages = (message,)
         return command_was_ok, refresh, newMessages
 
-    def _handle_start_command(self, gateway_id, refresh, sink_id):
+    def _handle_stop_command(
+        self, gateway_id, sink_id, sink, refresh, params, response
+    ):
+        return self._handle_start_stop(gateway_id, sink_id, _STOP_CONFIG)
 
-        command_was_ok = True
-        newMessages = list()
+    def _handle_start_command(
+        self, gateway_id, sink_id, sink, refresh, params, response
+    ):
+        return self._handle_start_stop(gateway_id, sink_id, _START_CONFIG)
 
-        new_config = dict(started=True)
-        message = self.mqtt_topics.request_message(
-            "set_config",
-            **dict(sink_id=sink_id, gw_id=gateway_id, new_config=new_config),
-        )
-        newMessages.append(message)
+    def _handle_start_stop(self, gateway_id, sink_id, new_config):
+
+        command_was_ok = True
         refresh = True
+        message = self.set_config_request(
+            sink_id=sink_id, gw_id=gateway_id, new_config=new_config
+        )
+        newMessages = (message,)
+
         return command_was_ok, refresh, newMessages
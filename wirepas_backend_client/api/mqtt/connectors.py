@@ -10,21 +10,33 @@
 
 import logging
 import os
+import socket
 import ssl
-import time
 import uuid
 
 import paho
 import paho.mqtt.client as mqtt
 
-from ...tools import Signal
+from ...tools import LoggerHelper, Signal
 
 
 class MQTT(object):
     """
     Generic MQTT handler for backend client sessions
+
+    The socket_options are (level, option, value) tuples applied with
+    setsockopt on every new connection, e.g. to raise SO_SNDBUF for large
+    payloads. By default TCP_NODELAY and SO_KEEPALIVE are set.
     """
 
+    # topic filters sent per SUBSCRIBE packet
+    SUBSCRIBE_CHUNK_SIZE = 500
+
+    DEFAULT_SOCKET_OPTIONS = [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
     def __init__(
         self,
         username: str,
@@ -52,6 +64,7 @@ class MQTT(object):
         publish_cb: callable = None,
         block_on_publish: bool = True,
         mqtt_protocol=None,
+        socket_options: list = None,
         logger: logging.Logger = None,
     ):
 
@@ -62,7 +75,7 @@ class MQTT(object):
         self.running = False
         self.heartbeat = heartbeat
         self.exit_signal = Signal(exit_signal)
-        self.id = "wm-gw-cli:{0}".format(uuid.uuid1(clock_seq=0).urn)
+        self.id = "wm-gw-cli:{0}".format(uuid.uuid4().urn)
 
         self.username = username
         self.password = password
@@ -71,7 +84,9 @@ class MQTT(object):
             self.cert_reqs = ssl.CERT_REQUIRED
 
         if tls_version is None:
-            self.tls_version = ssl.PROTOCOL_TLSv1_2
+            # negotiates the highest version supported by both ends
+            tls_version = ssl.PROTOCOL_TLS_CLIENT
+        self.tls_version = tls_version
 
         if mqtt_protocol is None:
             self.mqtt_protocol = mqtt.MQTTv311
@@ -89,9 +104,12 @@ class MQTT(object):
         self.certfile = certfile
         self.keyfile = keyfile
         self.ciphers = ciphers
+        self._ssl_context = None
 
         self.hostname = hostname
         self.port = port
+        # never includes the password, logged on every (re)connection
+        self._conn_banner = "{}@{}:{}".format(username, hostname, port)
 
         self.clean_session = clean_session
         self.userdata = userdata
@@ -111,10 +129,7 @@ class MQTT(object):
 
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
-        self.client.on_publish = self.on_publish
         self.client.on_disconnect = self.on_disconnect
-        self.client.on_unsubscribe = self.on_unsubscribe
-        self.client.on_log = self.on_log
 
         self.keep_alive = keep_alive
         self.allow_untrusted = allow_untrusted
@@ -122,11 +137,18 @@ class MQTT(object):
         self.publish_cb = publish_cb
         self.block_on_publish = block_on_publish
 
+        if socket_options is None:
+            self.socket_options = list(self.DEFAULT_SOCKET_OPTIONS)
+        else:
+            self.socket_options = socket_options
+
         self.message_subscribe_handlers = dict()
         if message_subscribe_handlers is not None:
             self.message_subscribe_handlers = message_subscribe_handlers
 
         self.subscription = set()
+        self._subscribe_list = list()
+        self._message_callbacks = dict()
 
     def serve(self: "MQTT"):
         """
@@ -150,7 +172,8 @@ class MQTT(object):
         while not self.exit_signal.is_set():
             self.logger.debug("mqtt loop running (timeout %s)", self.heartbeat)
             if self.publish_cb is None:
-                time.sleep(self.heartbeat)
+                # returns as soon as the exit signal is set
+                self.exit_signal.wait(self.heartbeat)
             else:
                 self.publish_cb(
                     timeout=self.heartbeat, block=self.block_on_publish
@@ -167,19 +190,14 @@ class MQTT(object):
     def connect(self: "MQTT"):
         """ Establishes a connection and service loop. """
 
-        self.logger.info(
-            "connecting to %s@%s:%s", self.username, self.hostname, self.port
-        )
+        self.logger.info("connecting to %s", self._conn_banner)
 
-        if self.force_unsecure is False:
-            self.client.tls_set(
-                ca_certs=self.ca_certs,
-                certfile=self.certfile,
-                keyfile=self.keyfile,
-                cert_reqs=self.cert_reqs,
-                tls_version=self.tls_version,
-                ciphers=self.ciphers,
-            )
+        self._set_trace_callbacks()
+
+        if self.force_unsecure is False and self._ssl_context is None:
+            # the client keeps the context for its reconnections
+            self._ssl_context = self._create_ssl_context()
+            self.client.tls_set_context(self._ssl_context)
 
             if self.allow_untrusted:
                 self.logger.warning(
@@ -192,6 +210,45 @@ class MQTT(object):
             self.hostname, port=self.port, keepalive=self.keep_alive
         )
 
+    def _set_trace_callbacks(self: "MQTT") -> None:
+        """
+        Attaches the callbacks which only log at the MQTT level.
+
+        They are left out when that level is disabled, which spares paho
+        from formatting its internal log lines and dispatching every ack.
+        """
+        if self.logger.isEnabledFor(LoggerHelper.DEBUG_LEVEL_VALUE_MQTT):
+            self.client.on_publish = self.on_publish
+            self.client.on_unsubscribe = self.on_unsubscribe
+            self.client.on_log = self.on_log
+        else:
+            self.client.on_publish = None
+            self.client.on_unsubscribe = None
+            self.client.on_log = None
+
+    def _create_ssl_context(self: "MQTT") -> ssl.SSLContext:
+        """ Builds the TLS context from the certificate settings """
+        context = ssl.SSLContext(self.tls_version)
+
+        if self.cert_reqs == ssl.CERT_NONE:
+            context.check_hostname = False
+        else:
+            context.check_hostname = True
+        context.verify_mode = self.cert_reqs
+
+        if self.ca_certs is not None:
+            context.load_verify_locations(cafile=self.ca_certs)
+        else:
+            context.load_default_certs()
+
+        if self.certfile is not None:
+            context.load_cert_chain(self.certfile, self.keyfile)
+
+        if self.ciphers is not None:
+            context.set_ciphers(self.ciphers)
+
+        return context
+
     def close(self: "MQTT") -> None:
         """ Handles disconnect from the pubsub. """
         if self.running:
@@ -205,12 +262,21 @@ class MQTT(object):
 
         Handlers is a dictionary with contains as key the topic filter
         and as value the callable who should handle such messages.
+
+        Callbacks which are already registered for their topic filter
+        are left untouched, so calling it again with the same handlers
+        (e.g., from serve) has no effect on paho's dispatch.
         """
 
         if handlers:
             for topic_filter, cb in handlers.items():
+                if self._message_callbacks.get(topic_filter) == cb:
+                    continue
                 self.client.message_callback_add(topic_filter, cb)
-                self.subscription.add(topic_filter)
+                self._message_callbacks[topic_filter] = cb
+                if topic_filter not in self.subscription:
+                    self.subscription.add(topic_filter)
+                    self._subscribe_list.append((topic_filter, 0))
                 self.logger.info("%s -> %s", topic_filter, cb)
 
             self.message_subscribe_handlers = handlers
@@ -246,23 +312,35 @@ class MQTT(object):
                 "connected to MQTT %s %s", flags, mqtt.connack_string(rc)
             )
 
-            for topic in self.subscription:
-                rc, mid = client.subscribe(topic)
+            # set on every connection as reconnects use a new socket
+            self._set_socket_options(client)
+
+            # subscribes to several topics per packet
+            chunk_size = self.SUBSCRIBE_CHUNK_SIZE
+            for start in range(0, len(self._subscribe_list), chunk_size):
+                end = start + chunk_size
+                topics = self._subscribe_list[start:end]
+                rc, mid = client.subscribe(topics)
 
                 if rc == mqtt.MQTT_ERR_SUCCESS:
-                    self.logger.info(
-                        "subscribed to topic: %s (%s, %s)", topic, mid, rc
+                    self.logger.debug(
+                        "subscribed topics (%s, %s): %s", mid, rc, topics
                     )
 
-                elif rc == mqtt.MQTT_ERR_SUCCESS:
+                else:
                     self.logger.error(
                         "failed topic subscription with " "%s: %s (%s, %s)",
-                        topic,
+                        topics,
                         mid,
                         rc,
                         mqtt.error_string(rc),
                     )
                     self.client.disconnect()
+                    break
+            else:
+                self.logger.info(
+                    "subscribed to %s topics", len(self._subscribe_list)
+                )
 
         else:
             self.logger.error(
@@ -270,6 +348,21 @@ class MQTT(object):
             )
             self.client.disconnect()
 
+    def _set_socket_options(self, client: "paho.mqtt.client") -> None:
+        """ Applies the socket options to the connection's socket """
+        sock = client.socket()
+        for level, option, value in self.socket_options:
+            try:
+                sock.setsockopt(level, option, value)
+            except (AttributeError, OSError) as err:
+                # e.g. websocket transport does not expose setsockopt
+                self.logger.warning(
+                    "could not set socket option %s/%s: %s",
+                    level,
+                    option,
+                    err,
+                )
+
     def on_disconnect(
         self: "MQTT", client: paho.mqtt.client, userdata: object, rc: int
     ):
@@ -379,9 +472,7 @@ class MQTT(object):
             retain (bool): when True, the broker will retain the message
             wait_for_publish (bool): when True, waits for the message to be published
         """
-        pubinfo = self.client.publish(
-            "{0}".format(topic), message, qos=qos, retain=retain
-        )
+        pubinfo = self.client.publish(topic, message, qos=qos, retain=retain)
 
         if pubinfo.rc != mqtt.MQTT_ERR_SUCCESS:
             self.logger.error(
@@ -396,5 +487,44 @@ class MQTT(object):
             except ValueError:
                 self.logger.error("Could not validate publish.")
 
+    def send_batch(self, messages: list, wait_for_publish: bool = False):
+        """
+        Publishes a batch of messages to the MQTT broker
+
+        All the messages are handed to the client before waiting on any of
+        them, letting the network loop write them back to back.
+
+        Args:
+            messages (list): (message, topic, qos, retain) tuples
+            wait_for_publish (bool): when True, waits for all the messages
+                to be published
+        """
+        pending = []
+        for message, topic, qos, retain in messages:
+            pubinfo = self.client.publish(
+                topic, message, qos=qos, retain=retain
+            )
+
+            if pubinfo.rc != mqtt.MQTT_ERR_SUCCESS:
+                self.logger.error(
+                    "publish: %s (%s)",
+                    mqtt.error_string(pubinfo.rc),
+                    pubinfo.rc,
+                )
+                self.exit_signal.set()
+                return
+
+            pending.append(pubinfo)
+
+        if wait_for_publish:
+            self.logger.info(
+                "Waiting for publish of %s messages.", len(pending)
+            )
+            for pubinfo in pending:
+                try:
+                    pubinfo.wait_for_publish()
+                except ValueError:
+                    self.logger.error("Could not validate publish.")
+
     def __str__(self):
-        return str("{}{}{}", self.username, self.hostname, self.port)
+        return self._conn_banner
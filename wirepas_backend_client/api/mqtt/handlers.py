@@ -127,12 +127,57 @@ class MQTTObserver(StreamObserver):
         The message consists of a dictionary with the following contents
         topic, qos, retain, wait_for_publish, data
 
+        A list of such dictionaries is also accepted, in which case all
+        of them are published as one batch.
+
         """
         try:
             message = self.rx_queue.get(timeout=timeout, block=block)
         except queue.Empty:
             return False
 
+        if isinstance(message, list):
+            return self.publish_batch(message)
+
+        return self.publish_message(message)
+
+    def publish_batch(self, messages: list) -> bool:
+        """ Publishes a list of request messages, returns True if sent """
+        batch = list()
+        wait_for_publish = False
+        for message in messages:
+            publish_args = self._publish_args(message)
+            if publish_args is not None:
+                batch.append(publish_args[:4])
+                wait_for_publish = wait_for_publish or publish_args[4]
+
+        if batch:
+            self.mqtt.send_batch(batch, wait_for_publish=wait_for_publish)
+            return True
+
+        return False
+
+    def publish_message(self, message: dict) -> bool:
+        """ Publishes a single request message, returns True if sent """
+        publish_args = self._publish_args(message)
+        if publish_args is None:
+            return False
+
+        data, topic, qos, retain, wait_for_publish = publish_args
+        self.mqtt.send(
+            message=data,
+            retain=retain,
+            qos=qos,
+            topic=topic,
+            wait_for_publish=wait_for_publish,
+        )
+        return True
+
+    def _publish_args(self, message: dict) -> tuple:
+        """
+        Returns the (data, topic, qos, retain, wait_for_publish) of a
+        request message or None when it lacks the data or the topic
+        """
         qos = MQTT_QOS_options.exactly_once.value
         retain = False
         wait_for_publish = False
@@ -160,16 +205,9 @@ class MQTTObserver(StreamObserver):
         self.logger.debug("message for MQTT publish %s", message)
 
         if data is not None and topic is not None:
-            self.mqtt.send(
-                message=data,
-                retain=retain,
-                qos=qos,
-                topic=topic,
-                wait_for_publish=wait_for_publish,
-            )
-            return True
+            return data, topic, qos, retain, wait_for_publish
 
-        return False
+        return None
 
     def run(self):
         """
@@ -11,11 +11,276 @@
 try:
     import MySQLdb
 except ImportError:
-    print("Failed to import MySQLdb")
-    pass
+    # reported when a connection is attempted
+    MySQLdb = None
 
+import functools
 import logging
 import json
+import operator
+
+from ...messages import AdvertiserMessage
+from ...messages import BootDiagnosticsMessage
+from ...messages import NeighborDiagnosticsMessage
+from ...messages import NodeDiagnosticsMessage
+from ...messages import TestNWMessage
+from ...messages import TrafficDiagnosticsMessage
+from ...messages import DiagnosticsMessage
+
+# version of the tables made by MySQL.create_tables, to be raised along
+# with any change to them so that existing databases are updated
+SCHEMA_VERSION = 4
+
+# received_packets columns and the placeholders of a single row; the
+# rows of a batch are sent as a single multi-row INSERT
+INSERT_RECEIVED_PACKETS = (
+    "INSERT INTO received_packets (logged_time, launch_time, path_delay_ms, "
+    "network_address, sink_address, source_address, dest_address, "
+    "source_endpoint, dest_endpoint, qos, num_bytes, hop_count) VALUES "
+)
+RECEIVED_PACKETS_ROW = (
+    "(from_unixtime(%s), from_unixtime(%s), %s, %s, %s, %s, %s, %s, %s, "
+    "%s, %s, %s)"
+)
+
+# the detail rows refer to their received packet by id, which lets the
+# rows of several messages share a single INSERT
+INSERT_DIAGNOSTICS_JSON = (
+    "INSERT INTO diagnostics_json (received_packet, apdu) VALUES "
+)
+INSERT_ADVERTISER_JSON = (
+    "INSERT INTO advertiser_json (received_packet, apdu) VALUES "
+)
+JSON_ROW = "(%s, %s)"
+
+INSERT_DIAGNOSTIC_TRAFFIC = (
+    "INSERT INTO diagnostic_traffic "
+    "(received_packet, access_cycles, "
+    "cluster_members, cluster_headnode_members, cluster_channel, "
+    "channel_reliability, rx_count, tx_count, aloha_rxs, resv_rx_ok, "
+    "data_rxs, dup_rxs, cca_ratio, bcast_ratio, tx_unicast_fail, "
+    "resv_usage_max, resv_usage_avg, aloha_usage_max) VALUES "
+)
+DIAGNOSTIC_TRAFFIC_ROW = "(" + ", ".join(["%s"] * 18) + ")"
+
+INSERT_DIAGNOSTIC_NEIGHBOR = (
+    "INSERT INTO diagnostic_neighbor "
+    "(received_packet, node_address, cluster_channel, "
+    "radio_power, device_info, norm_rssi) VALUES "
+)
+DIAGNOSTIC_NEIGHBOR_ROW = "(%s, %s, %s, %s, %s, %s)"
+
+INSERT_DIAGNOSTIC_BOOT = (
+    "INSERT INTO diagnostic_boot "
+    "(received_packet, boot_count, node_role, firmware_version, "
+    "scratchpad_seq, hw_magic, stack_profile, otap_enabled, "
+    "file_line_num, file_name_hash, stack_trace_0, stack_trace_1, "
+    "stack_trace_2, current_seq) VALUES "
+)
+DIAGNOSTIC_BOOT_ROW = "(" + ", ".join(["%s"] * 14) + ")"
+
+INSERT_DIAGNOSTIC_NODE = (
+    "INSERT INTO diagnostic_node "
+    "(received_packet, access_cycle_ms, node_role, voltage, "
+    "buf_usage_max, buf_usage_avg, mem_alloc_fails, "
+    "tc0_delay, tc1_delay, network_scans, "
+    "downlink_delay_avg_0, downlink_delay_min_0, "
+    "downlink_delay_max_0, downlink_delay_samples_0, "
+    "downlink_delay_avg_1, downlink_delay_min_1, "
+    "downlink_delay_max_1, downlink_delay_samples_1, "
+    "lltx_msg_w_ack, "
+    "lltx_msg_unack, "
+    "llrx_w_unack_ok, "
+    "llrx_ack_not_received, "
+    "lltx_cca_unack_fail, "
+    "lltx_cca_w_ack_fail, "
+    "llrx_w_ack_ok, "
+    "llrx_ack_otherreasons, "
+    "dropped_packets_0, dropped_packets_1, route_address, "
+    "next_hop_address_0, cost_0, quality_0, "
+    "next_hop_address_1, cost_1, quality_1, "
+    "blacklistexceeded, "
+    "pending_ucast_cluster, "
+    "pending_ucast_members, "
+    "pending_bcast_le_members, "
+    "pending_bcast_ll_members, "
+    "pending_bcast_unack, "
+    "pending_expire_queue, "
+    "pending_bcast_next_hop, "
+    "pending_reroute_packets) VALUES "
+)
+DIAGNOSTIC_NODE_ROW = "(" + ", ".join(["%s"] * 44) + ")"
+
+INSERT_DIAGNOSTIC_EVENT = (
+    "INSERT INTO diagnostic_event (received_packet, position, event) VALUES "
+)
+DIAGNOSTIC_EVENT_ROW = "(%s, %s, %s)"
+
+# known_nodes holds the latest status of each node, which is upserted
+# once per batch for the nodes of its packets and diagnostics
+INSERT_KNOWN_NODES_TIME = (
+    "INSERT INTO known_nodes (network_address, node_address, last_time) "
+    "VALUES "
+)
+KNOWN_NODES_TIME_ROW = "(%s, %s, CURRENT_TIMESTAMP(6))"
+KNOWN_NODES_TIME_UPDATE = (
+    " ON DUPLICATE KEY UPDATE last_time = VALUES(last_time)"
+)
+
+INSERT_KNOWN_NODES_STATUS = (
+    "INSERT INTO known_nodes "
+    "(network_address, node_address, voltage, node_role) VALUES "
+)
+KNOWN_NODES_STATUS_ROW = "(%s, %s, %s, %s)"
+KNOWN_NODES_STATUS_UPDATE = (
+    " ON DUPLICATE KEY UPDATE "
+    "voltage = VALUES(voltage), node_role = VALUES(node_role)"
+)
+
+INSERT_KNOWN_NODES_BOOT = (
+    "INSERT INTO known_nodes "
+    "(network_address, node_address, node_role, firmware_version, "
+    "scratchpad_seq, hw_magic, stack_profile, boot_count, "
+    "file_line_num, file_name_hash) VALUES "
+)
+KNOWN_NODES_BOOT_ROW = "(" + ", ".join(["%s"] * 10) + ")"
+KNOWN_NODES_BOOT_UPDATE = (
+    " ON DUPLICATE KEY UPDATE "
+    "node_role = VALUES(node_role), "
+    "firmware_version = VALUES(firmware_version), "
+    "scratchpad_seq = VALUES(scratchpad_seq), "
+    "hw_magic = VALUES(hw_magic), "
+    "stack_profile = VALUES(stack_profile), "
+    "boot_count = VALUES(boot_count), "
+    "file_line_num = VALUES(file_line_num), "
+    "file_name_hash = VALUES(file_name_hash)"
+)
+
+# the apdu fields stored by each diagnostics insert, in column order
+DIAGNOSTIC_TRAFFIC_FIELDS = (
+    "access_cycles",
+    "cluster_members",
+    "cluster_headnode_members",
+    "cluster_channel",
+    "channel_reliability",
+    "rx_amount",
+    "tx_amount",
+    "aloha_rx_ratio",
+    "reserved_rx_success_ratio",
+    "data_rx_ratio",
+    "rx_duplicate_ratio",
+    "cca_success_ratio",
+    "broadcast_ratio",
+    "failed_unicast_ratio",
+    "max_reserved_slot_usage",
+    "average_reserved_slot_usage",
+    "max_aloha_slot_usage",
+)
+
+DIAGNOSTIC_BOOT_FIELDS = (
+    "boot_count",
+    "node_role",
+    "firmware_version",
+    "scratchpad_sequence",
+    "hw_magic",
+    "stack_profile",
+    "otap_enabled",
+    "boot_line_number",
+    "file_hash",
+    "stack_trace_0",
+    "stack_trace_1",
+    "stack_trace_2",
+    "cur_seq",
+)
+
+DIAGNOSTIC_NODE_FIELDS = (
+    "access_cycle",
+    "role",
+    "voltage",
+    "max_buffer_usage",
+    "average_buffer_usage",
+    "mem_alloc_fails",
+    "normal_priority_buf_delay",
+    "high_priority_buf_delay",
+    "network_scans",
+    "dl_delay_avg_0",
+    "dl_delay_min_0",
+    "dl_delay_max_0",
+    "dl_delay_samples_0",
+    "dl_delay_avg_1",
+    "dl_delay_min_1",
+    "dl_delay_max_1",
+    "dl_delay_samples_1",
+    "lltx_msg_w_ack",
+    "lltx_msg_unack",
+    "llrx_w_unack_ok",
+    "llrx_ack_not_received",
+    "lltx_cca_unack_fail",
+    "lltx_cca_w_ack_fail",
+    "llrx_w_ack_ok",
+    "llrx_ack_otherreasons",
+    "dropped_packets_0",
+    "dropped_packets_1",
+    "route_address",
+    "cost_info_next_hop_0",
+    "cost_info_cost_0",
+    "cost_info_link_quality_0",
+    "cost_info_next_hop_1",
+    "cost_info_cost_1",
+    "cost_info_link_quality_1",
+    "blacklistexceeded",
+)
+
+# optional buffer statistics, stored as NULL when missing
+DIAGNOSTIC_NODE_OPTIONAL_FIELDS = (
+    "pending_ucast_cluster",
+    "pending_ucast_members",
+    "pending_bcast_le_members",
+    "pending_bcast_ll_members",
+    "pending_bcast_unack",
+    "pending_expire_queue",
+    "pending_bcast_next_hop",
+    "pending_reroute_packets",
+)
+
+# return the fields above of an apdu as a tuple, in column order
+DIAGNOSTIC_TRAFFIC_GETTER = operator.itemgetter(*DIAGNOSTIC_TRAFFIC_FIELDS)
+DIAGNOSTIC_BOOT_GETTER = operator.itemgetter(*DIAGNOSTIC_BOOT_FIELDS)
+DIAGNOSTIC_NODE_GETTER = operator.itemgetter(*DIAGNOSTIC_NODE_FIELDS)
+
+# the diagnostic_neighbor columns of a decoded neighbor entry
+DIAGNOSTIC_NEIGHBOR_GETTER = operator.itemgetter(
+    "address", "cluster_channel", "radio_power", "node_info", "rssi"
+)
+
+# the node diagnostics event slots, stored by position when set
+DIAGNOSTIC_EVENTS_GETTER = operator.itemgetter(
+    *["events_{}".format(position) for position in range(15)]
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _testnw_insert(testdata_id: int, field_count: int) -> tuple:
+    """
+    Returns the statement and row placeholders of a test network row
+
+    The tables and field counts repeat from a message to the next, so
+    the statements are built once and the rows of a table share them.
+    """
+    statement = (
+        "INSERT INTO TestData_ID_{} "
+        "(received_packet, logged_time, launch_time, field_count, ID_ctrl"
+        "{}) VALUES ".format(
+            testdata_id,
+            "".join(
+                ", DataCol_{}".format(column)
+                for column in range(1, field_count + 1)
+            ),
+        )
+    )
+    row = "(" + ", ".join(["%s"] * (field_count + 5)) + ")"
+
+    return statement, row
 
 
 class MySQL(object):
@@ -46,15 +311,31 @@ class MySQL(object):
         self.port = port
         self.cursor = None
         self.connection_timeout = connection_timeout
+        self.id_increment = 1
+        self.packet_id = None
+
+        # details rows builders by message type, subclasses are added
+        # on their first lookup
+        self._details_builders = {
+            DiagnosticsMessage: self._diagnostics_rows,
+            AdvertiserMessage: self._advertiser_rows,
+            TestNWMessage: self._testnw_rows,
+            BootDiagnosticsMessage: self._boot_diagnostics_rows,
+            NeighborDiagnosticsMessage: self._neighbor_diagnostics_rows,
+            NodeDiagnosticsMessage: self._node_diagnostics_rows,
+            TrafficDiagnosticsMessage: self._traffic_diagnostics_rows,
+        }
 
     def connect(self, table_creation=True) -> None:
         """ Establishes a connection and service loop. """
         # pylint: disable=locally-disabled, protected-access
 
+        if MySQLdb is None:
+            raise ImportError("Could not import MySQL module (MySQLdb)")
+
         self.logger.info(
-            "MySQL connection to %s:%s@%s:%s",
+            "MySQL connection to %s@%s:%s",
             self.username,
-            self.password,
             self.hostname,
             self.port,
         )
@@ -64,15 +345,16 @@ class MySQL(object):
             passwd=self.password,
             port=self.port,
             connect_timeout=self.connection_timeout,
+            autocommit=False,
         )
 
         self.cursor = self.database.cursor()
-        self.cursor.execute("SHOW DATABASES")
+
+        # identifiers can not be sent as parameters, so the name is quoted
+        database = "`{}`".format(self.database_name.replace("`", "``"))
 
         try:
-            self.cursor.execute(
-                "CREATE DATABASE {}".format(self.database_name)
-            )
+            self.cursor.execute("CREATE DATABASE {}".format(database))
         except MySQLdb._exceptions.ProgrammingError as error_message:
             if error_message.args[0] != 1007:
                 self.logger.error(
@@ -80,9 +362,13 @@ class MySQL(object):
                 )
                 raise
 
-        self.cursor.execute("USE {}".format(self.database_name))
+        self.cursor.execute("USE {}".format(database))
 
-        if table_creation:
+        # step between the ids of a multi-row insert
+        self.cursor.execute("SELECT @@auto_increment_increment")
+        self.id_increment = self.cursor.fetchone()[0]
+
+        if table_creation and not self.schema_is_current():
             self.create_tables()
 
     def close(self: "MySQL") -> None:
@@ -90,9 +376,63 @@ class MySQL(object):
         self.cursor.close()
         self.database.close()
 
+    def begin(self) -> None:
+        """ Opens a transaction """
+        self.database.begin()
+
+    def commit(self) -> None:
+        """ Commits the open transaction """
+        self.database.commit()
+
+    def rollback(self) -> None:
+        """ Discards the open transaction """
+        self.database.rollback()
+
+    def _column_names(self, table: str) -> set:
+        """ Returns the names of the table's columns """
+        self.cursor.execute("SHOW COLUMNS FROM {};".format(table))
+        return {row[0] for row in self.cursor.fetchall()}
+
+    def _index_names(self, table: str) -> set:
+        """ Returns the names of the table's indexes """
+        self.cursor.execute("SHOW INDEX FROM {};".format(table))
+        return {row[2] for row in self.cursor.fetchall()}
+
+    def schema_is_current(self) -> bool:
+        """
+        Tells if create_tables already ran with the current SCHEMA_VERSION
+
+        A single query, which spares the table creations, column checks
+        and trigger updates on every connection. A schema made by a newer
+        client is left as it is, rather than downgraded.
+        """
+        try:
+            self.cursor.execute("SELECT schema_version FROM app_metadata")
+        except MySQLdb._exceptions.ProgrammingError as error_message:
+            # the table does not exist yet
+            if error_message.args[0] != 1146:
+                raise
+            return False
+
+        row = self.cursor.fetchone()
+        if row is None:
+            return False
+
+        if row[0] > SCHEMA_VERSION:
+            self.logger.warning(
+                "MySQL schema version %s is newer than %s, "
+                "leaving the tables as they are",
+                row[0],
+                SCHEMA_VERSION,
+            )
+
+        return row[0] >= SCHEMA_VERSION
+
     def create_tables(self):
         """
         Create tables if they do not exist
+
+        Records SCHEMA_VERSION once all the tables are up to date.
         """
         # pylint: disable=locally-disabled, too-many-statements
 
@@ -133,7 +473,6 @@ class MySQL(object):
             "  PRIMARY KEY (id),"
             "  INDEX (logged_time),"
             "  INDEX (launch_time),"
-            "  INDEX (source_address),"
             "  INDEX packets_from_node (network_address, source_address)"
             ") ENGINE = InnoDB;"
         )
@@ -141,11 +480,7 @@ class MySQL(object):
 
         # See if we need to expand the old received_packets table with
         # the hop_count column.
-        query = "SHOW COLUMNS FROM received_packets;"
-        self.cursor.execute(query)
-        self.database.commit()
-        values = self.cursor.fetchall()
-        column_names = map(lambda x: x[0], values)
+        column_names = self._column_names("received_packets")
         if "hop_count" not in column_names:
             # hop_count was not in the table so add it.
             query = (
@@ -155,6 +490,14 @@ class MySQL(object):
             self.cursor.execute(query)
             self.database.commit()
 
+        # Older tables also index source_address alone, which only slows
+        # down the inserts as the lookups of a node go through
+        # packets_from_node.
+        if "source_address" in self._index_names("received_packets"):
+            self.cursor.execute(
+                "ALTER TABLE received_packets DROP INDEX source_address;"
+            )
+
         query = (
             "CREATE TABLE IF NOT EXISTS diagnostics_json ("
             "  received_packet BIGINT NOT NULL,"
@@ -173,11 +516,7 @@ class MySQL(object):
         )
         self.cursor.execute(createtable)
 
-        query = "SHOW COLUMNS FROM advertiser_json;"
-        self.cursor.execute(query)
-        self.database.commit()
-        values = self.cursor.fetchall()
-        column_names = map(lambda x: x[0], values)
+        column_names = self._column_names("advertiser_json")
         if "received_packet" not in column_names:
             # hop_count was not in the table so add it.
             query = (
@@ -243,11 +582,7 @@ class MySQL(object):
 
         # See if we need to expand the old diagnostic_traffic table with
         # the cluster_members and/or cluster_headnode_members column.
-        query = "SHOW COLUMNS FROM diagnostic_traffic;"
-        self.cursor.execute(query)
-        self.database.commit()
-        values = self.cursor.fetchall()
-        column_names = map(lambda x: x[0], values)
+        column_names = self._column_names("diagnostic_traffic")
         if "cluster_members" not in column_names:
             # cluster_members was not in the table so add it.
             query = (
@@ -349,11 +684,7 @@ class MySQL(object):
 
         # See if we need to expand the old diagnostic_boot table with
         # the current_seq.
-        query = "SHOW COLUMNS FROM diagnostic_boot;"
-        self.cursor.execute(query)
-
-        values = self.cursor.fetchall()
-        column_names = map(lambda x: x[0], values)
+        column_names = self._column_names("diagnostic_boot")
         if "current_seq" not in column_names:
             # current_seq was not in the table so add it.
             query = (
@@ -427,7 +758,7 @@ class MySQL(object):
 
         # Populate event codes
         createtable = (
-            "REPLACE INTO diagnostic_event_codes "
+            "INSERT INTO diagnostic_event_codes "
             "(code, name, description) VALUES "
             '(0x08, "role_change_to_subnode", '
             '"Role change: change to subnode"),'
@@ -503,7 +834,9 @@ class MySQL(object):
             '(76, "scan too many results",'
             '"Too many scan results to process (could also be temporal)"),'
             '(77, "own_active_late",'
-            '"Own active start was late");'
+            '"Own active start was late") '
+            "ON DUPLICATE KEY UPDATE "
+            "name = VALUES(name), description = VALUES(description);"
         )
 
         self.cursor.execute(createtable)
@@ -522,81 +855,14 @@ class MySQL(object):
 
         self.cursor.execute(createtable)
 
-        # Create trigger for updating known nodes when received packets is
-        # inserted
-        trigger = "DROP TRIGGER IF EXISTS after_received_packets_insert;"
-        self.cursor.execute(trigger)
-
-        # Note, there is no DELIMITER here
-        trigger = """CREATE
-                       TRIGGER after_received_packets_insert AFTER INSERT
-                       ON received_packets
-                       FOR EACH ROW BEGIN
-                           INSERT INTO known_nodes (network_address, node_address, last_time)
-                           VALUES
-                           (new.network_address,new.source_address, CURRENT_TIMESTAMP(6))
-                           ON DUPLICATE KEY UPDATE last_time=CURRENT_TIMESTAMP(6);
-                       END;"""
-        self.cursor.execute(trigger)
-
-        # Create a trigger for updating diagnostics node information to known
-        # nodes
-        trigger = "DROP TRIGGER IF EXISTS after_diagnostics_node_insert;"
-        self.cursor.execute(trigger)
-
-        trigger = """CREATE TRIGGER `after_diagnostics_node_insert` AFTER INSERT
-                     ON `diagnostic_node`
-                     FOR EACH ROW BEGIN
-                        INSERT INTO known_nodes (network_address, node_address, voltage, node_role)
-                        SELECT rp.network_address,
-                            rp.source_address,
-                            new.voltage,
-                            new.node_role
-                        FROM received_packets rp
-                        WHERE rp.id = new.received_packet
-                        ON DUPLICATE KEY UPDATE voltage=new.voltage,node_role=new.node_role;
-                     END;"""
-        self.cursor.execute(trigger)
-
-        # Create a trigger for updating boot info to known nodes
-        trigger = "DROP TRIGGER IF EXISTS after_diagnostic_boot_insert;"
-        self.cursor.execute(trigger)
-
-        trigger = """CREATE TRIGGER `after_diagnostic_boot_insert` AFTER INSERT ON `diagnostic_boot` FOR EACH ROW BEGIN
-        INSERT INTO known_nodes (
-            network_address,
-            node_address,
-             node_role,
-              firmware_version,
-              scratchpad_seq,
-              hw_magic,
-              stack_profile,
-              boot_count,
-              file_line_num,
-              file_name_hash)
-        SELECT rp.network_address,
-            rp.source_address,
-            new.node_role,
-            new.firmware_version,
-            new.scratchpad_seq,
-            new.hw_magic,
-            new.stack_profile,
-            new.boot_count,
-            new.file_line_num,
-            new.file_name_hash
-        FROM received_packets rp
-        WHERE rp.id=new.received_packet
-        ON DUPLICATE KEY UPDATE
-        node_role=new.node_role,
-        firmware_version=new.firmware_version,
-        scratchpad_seq=new.scratchpad_seq,
-        hw_magic=new.hw_magic,
-        stack_profile=new.stack_profile,
-        boot_count=new.boot_count,
-        file_line_num=new.file_line_num,
-        file_name_hash=new.file_name_hash;
-        END;"""
-        self.cursor.execute(trigger)
+        # known_nodes is updated along with each batch, by _touch_known_nodes
+        # and _update_known_nodes, instead of by triggers on every row
+        for trigger in (
+            "after_received_packets_insert",
+            "after_diagnostics_node_insert",
+            "after_diagnostic_boot_insert",
+        ):
+            self.cursor.execute("DROP TRIGGER IF EXISTS {};".format(trigger))
 
         # Create the debug log table
         createtable = (
@@ -607,17 +873,39 @@ class MySQL(object):
         )
         self.cursor.execute(createtable)
 
+        # the batches rely on row locks and on the consecutive ids of a
+        # multi-row insert, so tables made with other engines are moved
+        self.cursor.execute(
+            "SELECT table_name FROM information_schema.tables"
+            " WHERE table_schema = DATABASE()"
+            " AND table_type = 'BASE TABLE' AND engine <> 'InnoDB'"
+        )
+        for (table,) in self.cursor.fetchall():
+            self.logger.info("Converting table %s to InnoDB", table)
+            self.cursor.execute(
+                "ALTER TABLE `{}` ENGINE = InnoDB".format(table)
+            )
+
+        createtable = (
+            "CREATE TABLE IF NOT EXISTS app_metadata ("
+            "  id TINYINT UNSIGNED NOT NULL,"
+            "  schema_version INT UNSIGNED NOT NULL,"
+            "  PRIMARY KEY (id)"
+            ") ENGINE = InnoDB;"
+        )
+        self.cursor.execute(createtable)
+        self.cursor.execute(
+            "REPLACE INTO app_metadata (id, schema_version) VALUES (1, %s)",
+            (SCHEMA_VERSION,),
+        )
+
         self.database.commit()
 
     def update_diagnostic_node_table_4_0(self):
         """ Checks if there is a need to expand the old diagnostic_node
         table with the new fields introduced in stack release 4.0"""
 
-        query = "SHOW COLUMNS FROM diagnostic_node;"
-        self.cursor.execute(query)
-        self.database.commit()
-        values = self.cursor.fetchall()
-        column_names = map(lambda x: x[0], values)
+        column_names = self._column_names("diagnostic_node")
         if "lltx_msg_w_ack" not in column_names:
             # lltx_msg_w_ack was not in the table so add it.
             query = (
@@ -695,11 +983,7 @@ class MySQL(object):
         """ Checks if there is a need to expand the old diagnostic_node
         table with the new fields introduced in stack release 4.2"""
 
-        query = "SHOW COLUMNS FROM diagnostic_node;"
-        self.cursor.execute(query)
-        self.database.commit()
-        values = self.cursor.fetchall()
-        column_names = map(lambda x: x[0], values)
+        column_names = self._column_names("diagnostic_node")
         # Optional buffer statistics
         if "pending_ucast_cluster" not in column_names:
             query = (
@@ -758,339 +1042,393 @@ class MySQL(object):
             self.cursor.execute(query)
             self.database.commit()
 
-    def put_to_received_packets(self, message):
-        """ Insert received packet to the database """
+    def insert_rows(
+        self, statement: str, row: str, rows: list, suffix: str = ""
+    ) -> None:
+        """
+        Inserts rows with a single multi-row INSERT
+
+        The statement ends with VALUES and row holds the placeholders
+        of a single row. The suffix, such as an ON DUPLICATE KEY UPDATE
+        clause, follows the rows. executemany is not used as it only
+        merges rows whose placeholders are bare, which excludes
+        from_unixtime(%s).
+        """
+        values = list()
+        for params in rows:
+            values.extend(params)
+
+        self.cursor.execute(
+            statement + ",".join([row] * len(rows)) + suffix, tuple(values)
+        )
+
+    @staticmethod
+    def _received_packet_row(message) -> tuple:
+        """ Returns the received_packets column values of a message """
         try:
             hop_count = message.hop_count
-        except:
+        except AttributeError:
             hop_count = 0
-        query = (
-            "INSERT INTO received_packets (logged_time, launch_time, path_delay_ms, network_address, sink_address, source_address, "
-            "dest_address, source_endpoint, dest_endpoint, qos, num_bytes, hop_count) "
-            "VALUES (from_unixtime({}), from_unixtime({}), {}, {}, {}, {}, {}, {}, {}, {}, {}, {});".format(
-                message.rx_time_ms_epoch / 1000,
-                (message.rx_time_ms_epoch - message.travel_time_ms) / 1000,
-                message.travel_time_ms,
-                message.network_id,
-                message.destination_address,
-                message.source_address,
-                message.destination_address,
-                message.source_endpoint,
-                message.destination_endpoint,
-                message.qos,
-                len(message.data_payload),
-                hop_count,
-            )
+
+        return (
+            message.rx_time_ms_epoch / 1000,
+            (message.rx_time_ms_epoch - message.travel_time_ms) / 1000,
+            message.travel_time_ms,
+            message.network_id,
+            message.destination_address,
+            message.source_address,
+            message.destination_address,
+            message.source_endpoint,
+            message.destination_endpoint,
+            message.qos,
+            len(message.data_payload),
+            hop_count,
         )
-        self.cursor.execute(query)
-        self.database.commit()
 
-    def put_diagnostics(self, message):
-        """ Dumps the diagnostic object into a table """
+    def put_to_received_packets(self, messages, commit: bool = True):
+        """
+        Insert received packets to the database
+
+        Accepts a single message or a list of messages, which are
+        inserted with one statement and one commit. Without commit the
+        rows are left in the open transaction, for the details inserts
+        to commit along with their own rows.
 
-        statement = (
-            "INSERT INTO diagnostics_json (received_packet, apdu) "
-            "VALUES (LAST_INSERT_ID(), %s)"
+        The id of the first inserted packet is kept as packet_id.
+        """
+        if not isinstance(messages, list):
+            messages = [messages]
+
+        self.insert_rows(
+            INSERT_RECEIVED_PACKETS,
+            RECEIVED_PACKETS_ROW,
+            [self._received_packet_row(message) for message in messages],
         )
-        values = json.dumps(message.serialize())
-        self.cursor.execute(statement, (values,))
-        self.database.commit()
+        # read before the known_nodes upsert, which resets lastrowid
+        self.packet_id = self.cursor.lastrowid
+        self._touch_known_nodes(
+            [
+                (message.network_id, message.source_address)
+                for message in messages
+            ]
+        )
+        if commit:
+            self.commit()
 
-    def put_advertiser(self, message):
-        """ Dumps the advertiser object into a table """
+    def put_batch(self, messages: list) -> None:
+        """ Inserts messages along with their details in one transaction """
+        if not messages:
+            return
 
-        statement = "INSERT INTO advertiser_json (received_packet, apdu) VALUES (LAST_INSERT_ID(), %s)"
-        message.full_adv_serialization = True
-        values = json.dumps(message.serialize())
-        self.cursor.execute(statement, (values,))
-        self.database.commit()
+        self.put_rows(*self.batch_rows(messages))
 
-    def put_traffic_diagnostics(self, message):
-        """ Insert traffic diagnostic packets """
+    def batch_rows(self, messages: list) -> tuple:
+        """
+        Returns the rows of the messages, to be inserted by put_rows
 
-        query = (
-            "INSERT INTO diagnostic_traffic "
-            "(received_packet, access_cycles, "
-            "cluster_members, cluster_headnode_members, cluster_channel, "
-            "channel_reliability, rx_count, tx_count, aloha_rxs, resv_rx_ok, "
-            "data_rxs, dup_rxs, cca_ratio, bcast_ratio, tx_unicast_fail, "
-            "resv_usage_max, resv_usage_avg, aloha_usage_max)"
-            "VALUES (LAST_INSERT_ID(),{},{},{},{},{},{},{},{},{},{},{},{},{},"
-            "{},{},{},{});".format(
-                message.apdu["access_cycles"],
-                message.apdu["cluster_members"],
-                message.apdu["cluster_headnode_members"],
-                message.apdu["cluster_channel"],
-                message.apdu["channel_reliability"],
-                message.apdu["rx_amount"],
-                message.apdu["tx_amount"],
-                message.apdu["aloha_rx_ratio"],
-                message.apdu["reserved_rx_success_ratio"],
-                message.apdu["data_rx_ratio"],
-                message.apdu["rx_duplicate_ratio"],
-                message.apdu["cca_success_ratio"],
-                message.apdu["broadcast_ratio"],
-                message.apdu["failed_unicast_ratio"],
-                message.apdu["max_reserved_slot_usage"],
-                message.apdu["average_reserved_slot_usage"],
-                message.apdu["max_aloha_slot_usage"],
+        The rows are plain tuples, cheaper than the messages to send to
+        another process. Until put_rows inserts them, the details rows
+        refer to their packet by its index in the batch.
+        """
+        # the builders are bound once for the whole batch
+        packet_row = self._received_packet_row
+        details_rows = self._details_rows
+
+        packets = list()
+        details = list()
+        for index, message in enumerate(messages):
+            packets.append(packet_row(message))
+            details.extend(details_rows(index, message))
+
+        return packets, details
+
+    def put_rows(self, packets: list, details: list) -> None:
+        """
+        Inserts the rows of batch_rows in one transaction
+
+        The received packets share a single multi-row INSERT, whose
+        auto increment ids are consecutive (in steps of the server's
+        auto_increment_increment), and the first of them is reported as
+        the cursor's lastrowid. Each details row gets the id of its
+        packet from that range, so the details of every table are
+        inserted with a single statement as well.
+
+        The batch is committed once, or rolled back when any of its
+        inserts fails.
+        """
+        self.begin()
+        try:
+            self.insert_rows(
+                INSERT_RECEIVED_PACKETS, RECEIVED_PACKETS_ROW, packets
             )
-        )
 
-        self.cursor.execute(query)
-        self.database.commit()
+            first_id = self.cursor.lastrowid
+            increment = self.id_increment
+            self._put_details(
+                [
+                    (
+                        statement,
+                        row,
+                        (first_id + values[0] * increment,) + values[1:],
+                    )
+                    for statement, row, values in details
+                ],
+                commit=False,
+            )
 
-    def put_neighbor_diagnostics(self, message):
-        """ Insert neighbor diagnostic packets """
+            # received_packets network_address and source_address
+            nodes = [(packet[3], packet[5]) for packet in packets]
+            self._touch_known_nodes(nodes)
+            self._update_known_nodes(nodes, details)
+        except MySQLdb.Error:
+            self.rollback()
+            raise
+
+        self.commit()
+
+    @staticmethod
+    def merge_rows(batches: list) -> tuple:
+        """ Merges several batch_rows results into one """
+        packets = list()
+        details = list()
+        for batch_packets, batch_details in batches:
+            offset = len(packets)
+            packets.extend(batch_packets)
+            details.extend(
+                (statement, row, (values[0] + offset,) + values[1:])
+                for statement, row, values in batch_details
+            )
+
+        return packets, details
+
+    def _put_details(self, rows: list, commit: bool = True) -> None:
+        """
+        Inserts (statement, row, values) entries
+
+        The entries of the same statement are merged into one INSERT,
+        in the order in which each statement first appears. Without
+        commit the rows are left in the open transaction.
+        """
+        tables = dict()
+        for statement, row, values in rows:
+            try:
+                tables[statement][1].append(values)
+            except KeyError:
+                tables[statement] = (row, [values])
+
+        for statement, (row, values) in tables.items():
+            self.insert_rows(statement, row, values)
+
+        if commit:
+            self.commit()
+
+    def _touch_known_nodes(self, nodes: list) -> None:
+        """ Sets the last_time of the (network, node) address pairs """
+        if nodes:
+            # sorted, for concurrent batches to lock the rows in one order
+            self.insert_rows(
+                INSERT_KNOWN_NODES_TIME,
+                KNOWN_NODES_TIME_ROW,
+                sorted(set(nodes)),
+                KNOWN_NODES_TIME_UPDATE,
+            )
+
+    def _update_known_nodes(self, nodes, details: list) -> None:
+        """
+        Copies the node and boot diagnostics of the details rows to
+        known_nodes
+
+        nodes maps the received_packet value of the details rows to the
+        (network, node) addresses of their packet. Each node is written
+        once, with its last values in the batch.
+        """
+        status = dict()
+        boots = dict()
+        for statement, _, values in details:
+            if statement == INSERT_DIAGNOSTIC_NODE:
+                # voltage, node_role
+                status[nodes[values[0]]] = (values[3], values[2])
+            elif statement == INSERT_DIAGNOSTIC_BOOT:
+                # node_role, firmware_version, scratchpad_seq, hw_magic,
+                # stack_profile, boot_count, file_line_num, file_name_hash
+                boots[nodes[values[0]]] = (
+                    values[2:7] + (values[1],) + values[8:10]
+                )
+
+        if status:
+            self.insert_rows(
+                INSERT_KNOWN_NODES_STATUS,
+                KNOWN_NODES_STATUS_ROW,
+                [node + status[node] for node in sorted(status)],
+                KNOWN_NODES_STATUS_UPDATE,
+            )
 
-        # See if any neighbors, do not do insert
+        if boots:
+            self.insert_rows(
+                INSERT_KNOWN_NODES_BOOT,
+                KNOWN_NODES_BOOT_ROW,
+                [node + boots[node] for node in sorted(boots)],
+                KNOWN_NODES_BOOT_UPDATE,
+            )
+
+    def _details_rows(self, packet_id: int, message) -> list:
+        """ Returns the details rows of a message according to its type """
+        message_type = type(message)
         try:
-            if message.neighbor[0]["address"] == 0:
-                return
+            builder = self._details_builders[message_type]
         except KeyError:
-            return
-
-        # Insert all neighbors at once
-        values = []
+            builder = None
+            for base in message_type.__mro__[1:]:
+                if base in self._details_builders:
+                    builder = self._details_builders[base]
+                    break
+            # plain packets are cached as well
+            self._details_builders[message_type] = builder
+
+        if builder is None:
+            return []
+        return builder(packet_id, message)
+
+    @staticmethod
+    def _diagnostics_rows(packet_id, message) -> list:
+        """ Returns the diagnostics_json row of the message """
+        values = (packet_id, json.dumps(message.serialize()))
+        return [(INSERT_DIAGNOSTICS_JSON, JSON_ROW, values)]
+
+    @staticmethod
+    def _advertiser_rows(packet_id, message) -> list:
+        """ Returns the advertiser_json row of the message """
+        message.full_adv_serialization = True
+        values = (packet_id, json.dumps(message.serialize()))
+        return [(INSERT_ADVERTISER_JSON, JSON_ROW, values)]
+
+    @staticmethod
+    def _traffic_diagnostics_rows(packet_id, message) -> list:
+        """ Returns the diagnostic_traffic row of the message """
+        values = (packet_id,) + DIAGNOSTIC_TRAFFIC_GETTER(message.apdu)
+        return [(INSERT_DIAGNOSTIC_TRAFFIC, DIAGNOSTIC_TRAFFIC_ROW, values)]
+
+    @staticmethod
+    def _neighbor_diagnostics_rows(packet_id, message) -> list:
+        """ Returns the diagnostic_neighbor rows of the message """
+        rows = []
         for i in range(0, 14):
             try:
-                if message.neighbor[i]["address"] == 0:
+                neighbor = message.neighbor[i]
+                if neighbor["address"] == 0:
                     break
             except KeyError:
                 # Number of neighbors depends on profile and can be less than
                 # 14
                 break
 
-            values.append(
-                "(LAST_INSERT_ID(),{},{},{},{},{})".format(
-                    message.neighbor[i]["address"],
-                    message.neighbor[i]["cluster_channel"],
-                    message.neighbor[i]["radio_power"],
-                    message.neighbor[i]["node_info"],
-                    message.neighbor[i]["rssi"],
-                )
+            values = (packet_id,) + DIAGNOSTIC_NEIGHBOR_GETTER(neighbor)
+            rows.append(
+                (INSERT_DIAGNOSTIC_NEIGHBOR, DIAGNOSTIC_NEIGHBOR_ROW, values)
             )
 
-        query = (
-            "INSERT INTO diagnostic_neighbor "
-            "(received_packet, node_address, cluster_channel, "
-            "radio_power, device_info, norm_rssi) "
-            "VALUES {};".format(",".join(values))
+        return rows
+
+    @staticmethod
+    def _boot_diagnostics_rows(packet_id, message) -> list:
+        """ Returns the diagnostic_boot row of the message """
+        values = (packet_id,) + DIAGNOSTIC_BOOT_GETTER(message.apdu)
+        return [(INSERT_DIAGNOSTIC_BOOT, DIAGNOSTIC_BOOT_ROW, values)]
+
+    @staticmethod
+    def _node_diagnostics_rows(packet_id, message) -> list:
+        """ Returns the diagnostic_node and diagnostic_event rows """
+        apdu = message.apdu
+        values = (
+            (packet_id,)
+            + DIAGNOSTIC_NODE_GETTER(apdu)
+            + tuple(
+                apdu.get(field) for field in DIAGNOSTIC_NODE_OPTIONAL_FIELDS
+            )
         )
+        rows = [(INSERT_DIAGNOSTIC_NODE, DIAGNOSTIC_NODE_ROW, values)]
 
-        self.cursor.execute(query)
-        self.database.commit()
-
-    def put_boot_diagnostics(self, message):
-        """ Insert boot diagnostic packets """
-
-        query = (
-            "INSERT INTO diagnostic_boot "
-            "(received_packet, boot_count, node_role, firmware_version, "
-            "scratchpad_seq, hw_magic, stack_profile, otap_enabled, "
-            "file_line_num, file_name_hash, stack_trace_0, stack_trace_1, "
-            "stack_trace_2, current_seq) "
-            "VALUES (LAST_INSERT_ID(), {}, {}, {}, {}, {}, {}, {}, {}, "
-            "{}, {}, {}, {}, {});".format(
-                message.apdu["boot_count"],
-                message.apdu["node_role"],
-                message.apdu["firmware_version"],
-                message.apdu["scratchpad_sequence"],
-                message.apdu["hw_magic"],
-                message.apdu["stack_profile"],
-                message.apdu["otap_enabled"],
-                message.apdu["boot_line_number"],
-                message.apdu["file_hash"],
-                message.apdu["stack_trace_0"],
-                message.apdu["stack_trace_1"],
-                message.apdu["stack_trace_2"],
-                message.apdu["cur_seq"],
+        # Create events
+        rows.extend(
+            (
+                INSERT_DIAGNOSTIC_EVENT,
+                DIAGNOSTIC_EVENT_ROW,
+                (packet_id, i, event),
             )
+            for i, event in enumerate(DIAGNOSTIC_EVENTS_GETTER(apdu))
+            if event != 0
         )
-        self.cursor.execute(query)
-        self.database.commit()
-
-    def put_node_diagnostics(self, message):
-        """ Insert node diagnostic packets """
-        # pylint: disable=locally-disabled, too-many-branches
 
-        # Remember the last received packet (that was received_packets)
-        last_received_packet = self.cursor.lastrowid
-
-        pending_ucast_cluster = "NULL"
-        pending_ucast_members = "NULL"
-        pending_bcast_le_mbers = "NULL"
-        pending_bcast_ll_mbers = "NULL"
-        pending_bcast_unack = "NULL"
-        pending_expire_queue = "NULL"
-        pending_bcast_next_hop = "NULL"
-        pending_reroute_packets = "NULL"
-
-        # Optional buffer statistics
-        if "pending_ucast_cluster" in message.apdu:
-            pending_ucast_cluster = message.apdu["pending_ucast_cluster"]
-
-        if "pending_ucast_members" in message.apdu:
-            pending_ucast_members = message.apdu["pending_ucast_members"]
-
-        if "pending_bcast_le_members" in message.apdu:
-            pending_bcast_le_mbers = message.apdu["pending_bcast_le_members"]
+        return rows
+
+    @staticmethod
+    def _testnw_rows(packet_id, message) -> list:
+        """ Returns the rows of the test network application tables """
+        logged_time = message.rx_time_ms_epoch / 1000
+        launch_time = (
+            message.rx_time_ms_epoch - message.travel_time_ms
+        ) / 1000
+
+        apdu = message.apdu
+        rows = []
+        for row in range(apdu["row_count"]):
+            field_count = apdu["number_of_fields"][row]
+            statement, placeholders = _testnw_insert(
+                apdu["testdata_id"][row], field_count
+            )
+            values = (
+                packet_id,
+                logged_time,
+                launch_time,
+                field_count,
+                apdu["id_ctrl"][row],
+            ) + tuple(apdu["datafields"][row])
 
-        if "pending_bcast_ll_members" in message.apdu:
-            pending_bcast_ll_mbers = message.apdu["pending_bcast_ll_members"]
+            rows.append((statement, placeholders, values))
 
-        if "pending_bcast_unack" in message.apdu:
-            pending_bcast_unack = message.apdu["pending_bcast_unack"]
+        return rows
 
-        if "pending_expire_queue" in message.apdu:
-            pending_expire_queue = message.apdu["pending_expire_queue"]
+    # The methods below insert the details of a single message, which
+    # refer to the packet_id stored by put_to_received_packets
 
-        if "pending_bcast_next_hop" in message.apdu:
-            pending_bcast_next_hop = message.apdu["pending_bcast_next_hop"]
+    def put_diagnostics(self, message):
+        """ Dumps the diagnostic object into a table """
+        self._put_details(self._diagnostics_rows(self.packet_id, message))
 
-        if "pending_reroute_packets" in message.apdu:
-            pending_reroute_packets = message.apdu["pending_reroute_packets"]
+    def put_advertiser(self, message):
+        """ Dumps the advertiser object into a table """
+        self._put_details(self._advertiser_rows(self.packet_id, message))
 
-        query = (
-            "INSERT INTO diagnostic_node "
-            "(received_packet, access_cycle_ms, node_role, voltage, "
-            "buf_usage_max, buf_usage_avg, mem_alloc_fails, "
-            "tc0_delay, tc1_delay, network_scans, "
-            "downlink_delay_avg_0, downlink_delay_min_0, "
-            "downlink_delay_max_0, downlink_delay_samples_0, "
-            "downlink_delay_avg_1, downlink_delay_min_1, "
-            "downlink_delay_max_1, downlink_delay_samples_1, "
-            "lltx_msg_w_ack, "
-            "lltx_msg_unack, "
-            "llrx_w_unack_ok, "
-            "llrx_ack_not_received, "
-            "lltx_cca_unack_fail, "
-            "lltx_cca_w_ack_fail, "
-            "llrx_w_ack_ok, "
-            "llrx_ack_otherreasons, "
-            "dropped_packets_0, dropped_packets_1, route_address, "
-            "next_hop_address_0, cost_0, quality_0, "
-            "next_hop_address_1, cost_1, quality_1, "
-            "blacklistexceeded, "
-            "pending_ucast_cluster, "
-            "pending_ucast_members, "
-            "pending_bcast_le_members, "
-            "pending_bcast_ll_members, "
-            "pending_bcast_unack, "
-            "pending_expire_queue, "
-            "pending_bcast_next_hop, "
-            "pending_reroute_packets) "
-            "VALUES (LAST_INSERT_ID(),{},{},{},{},{},{},{},{},{},{},{},{},{},"
-            "{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},"
-            "{},{},{},{},{},{},{},{},{});".format(
-                message.apdu["access_cycle"],
-                message.apdu["role"],
-                message.apdu["voltage"],
-                message.apdu["max_buffer_usage"],
-                message.apdu["average_buffer_usage"],
-                message.apdu["mem_alloc_fails"],
-                message.apdu["normal_priority_buf_delay"],
-                message.apdu["high_priority_buf_delay"],
-                message.apdu["network_scans"],
-                message.apdu["dl_delay_avg_0"],
-                message.apdu["dl_delay_min_0"],
-                message.apdu["dl_delay_max_0"],
-                message.apdu["dl_delay_samples_0"],
-                message.apdu["dl_delay_avg_1"],
-                message.apdu["dl_delay_min_1"],
-                message.apdu["dl_delay_max_1"],
-                message.apdu["dl_delay_samples_1"],
-                message.apdu["lltx_msg_w_ack"],
-                message.apdu["lltx_msg_unack"],
-                message.apdu["llrx_w_unack_ok"],
-                message.apdu["llrx_ack_not_received"],
-                message.apdu["lltx_cca_unack_fail"],
-                message.apdu["lltx_cca_w_ack_fail"],
-                message.apdu["llrx_w_ack_ok"],
-                message.apdu["llrx_ack_otherreasons"],
-                message.apdu["dropped_packets_0"],
-                message.apdu["dropped_packets_1"],
-                message.apdu["route_address"],
-                message.apdu["cost_info_next_hop_0"],
-                message.apdu["cost_info_cost_0"],
-                message.apdu["cost_info_link_quality_0"],
-                message.apdu["cost_info_next_hop_1"],
-                message.apdu["cost_info_cost_1"],
-                message.apdu["cost_info_link_quality_1"],
-                message.apdu["blacklistexceeded"],
-                pending_ucast_cluster,
-                pending_ucast_members,
-                pending_bcast_le_mbers,
-                pending_bcast_ll_mbers,
-                pending_bcast_unack,
-                pending_expire_queue,
-                pending_bcast_next_hop,
-                pending_reroute_packets,
-            )
+    def put_traffic_diagnostics(self, message):
+        """ Insert traffic diagnostic packets """
+        self._put_details(
+            self._traffic_diagnostics_rows(self.packet_id, message)
         )
 
-        self.cursor.execute(query)
-        self.database.commit()
+    def put_neighbor_diagnostics(self, message):
+        """ Insert neighbor diagnostic packets """
+        self._put_details(
+            self._neighbor_diagnostics_rows(self.packet_id, message)
+        )
 
-        # Create events
-        events = []
-        for i in range(0, 15):
-            event = message.apdu["events_{}".format(i)]
-            if event != 0:
-                events.append(
-                    "({},{},{})".format(last_received_packet, i, event)
-                )
+    def put_boot_diagnostics(self, message):
+        """ Insert boot diagnostic packets """
+        self._put_known_node_details(self._boot_diagnostics_rows, message)
 
-        if events:
-            query = (
-                "INSERT INTO diagnostic_event "
-                "(received_packet, position, event) "
-                "VALUES {};".format(",".join(events))
-            )
-            self.cursor.execute(query)
-            self.database.commit()
+    def put_node_diagnostics(self, message):
+        """ Insert node diagnostic packets """
+        self._put_known_node_details(self._node_diagnostics_rows, message)
+
+    def _put_known_node_details(self, builder, message):
+        """ Inserts the details rows and copies them to known_nodes """
+        packet_id = self.packet_id
+        rows = builder(packet_id, message)
+        self._put_details(rows, commit=False)
+        self._update_known_nodes(
+            {packet_id: (message.network_id, message.source_address)}, rows
+        )
+        self.commit()
 
     def put_testnw_measurements(self, message):
         """ Insert received test network application packets """
-
-        for row in range(message.apdu["row_count"]):
-            table_name = "TestData_ID_" + str(message.apdu["testdata_id"][row])
-
-            data_column_names = ",".join(
-                map(
-                    lambda x: "DataCol_" + str(x),
-                    range(1, message.apdu["number_of_fields"][row] + 1),
-                )
-            )
-
-            data_column_values = ",".join(
-                map(str, message.apdu["datafields"][row])
-            )
-
-            query = (
-                "INSERT INTO "
-                + table_name
-                + " "
-                + "(received_packet,"
-                + "logged_time,"
-                + "launch_time,"
-                + "field_count,"
-                + "ID_ctrl,"
-                + data_column_names
-                + ")"
-                + " VALUES ("
-                + "LAST_INSERT_ID(),"
-                + "{0:.32f},".format(message.rx_time_ms_epoch / 1000)
-                + "{0:.32f},".format(
-                    (message.rx_time_ms_epoch - message.travel_time_ms) / 1000
-                )
-                + str(message.apdu["number_of_fields"][row])
-                + ","
-                + str(message.apdu["id_ctrl"][row])
-                + ","
-                + data_column_values
-                + ")"
-            )
-
-            self.cursor.execute(query)
-            self.database.commit()
+        self._put_details(self._testnw_rows(self.packet_id, message))
@@ -18,24 +18,31 @@ except ImportError:
 import logging
 import multiprocessing
 import queue
+import threading
 import time
 
 from ..stream import StreamObserver
-from ...messages import AdvertiserMessage
-from ...messages import BootDiagnosticsMessage
-from ...messages import NeighborDiagnosticsMessage
-from ...messages import NodeDiagnosticsMessage
-from ...messages import TestNWMessage
-from ...messages import TrafficDiagnosticsMessage
-from ...messages import DiagnosticsMessage
 from ...tools import Settings
 
 
 from .connectors import MySQL
 
+# client errors of a lost connection: server has gone away, lost
+# connection during query and lost connection at a system error
+CONNECTION_LOST_ERRORS = (2006, 2013, 2055)
+
 
 class MySQLObserver(StreamObserver):
-    """ MySQLObserver monitors the internal queues and dumps events to the database """
+    """
+    MySQLObserver monitors the internal queues and dumps events to the database
+
+    Messages are written in batches of up to max_batch messages, which are
+    flushed at the latest max_batch_delay seconds after the first of them
+    was received.
+    """
+
+    # batches waiting for each pool worker before the dispatch blocks
+    SHARD_QUEUE_SIZE = 64
 
     def __init__(
         self,
@@ -47,6 +54,8 @@ class MySQLObserver(StreamObserver):
         parallel: bool = True,
         n_workers: int = 10,
         timeout: int = 10,
+        max_batch: int = 512,
+        max_batch_delay: float = 0.2,
         logger=None,
     ) -> "MySQLObserver":
         super(MySQLObserver, self).__init__(
@@ -71,6 +80,8 @@ class MySQLObserver(StreamObserver):
         self.timeout = timeout
         self.parallel = parallel
         self.n_workers = n_workers
+        self.max_batch = max_batch
+        self.max_batch_delay = max_batch_delay
 
     def on_data_received(self):
         """ Monitor inbound queue for messages to be stored in MySQL """
@@ -83,31 +94,76 @@ class MySQLObserver(StreamObserver):
                 message = None
                 continue
 
-            self._map_message(self.mysql, message)
+            self._map_batch(
+                self.mysql,
+                self._drain(
+                    self.rx_queue,
+                    message,
+                    self.max_batch,
+                    self.max_batch_delay,
+                ),
+            )
 
     @staticmethod
-    def _map_message(mysql, message):
-        """ Inserts the message according to its type """
-        mysql.put_to_received_packets(message)
-        if isinstance(message, DiagnosticsMessage):
-            mysql.put_diagnostics(message)
-        elif isinstance(message, AdvertiserMessage):
-            mysql.put_advertiser(message)
-        elif isinstance(message, TestNWMessage):
-            mysql.put_testnw_measurements(message)
-        elif isinstance(message, BootDiagnosticsMessage):
-            mysql.put_boot_diagnostics(message)
-        elif isinstance(message, NeighborDiagnosticsMessage):
-            mysql.put_neighbor_diagnostics(message)
-        elif isinstance(message, NodeDiagnosticsMessage):
-            mysql.put_node_diagnostics(message)
-        elif isinstance(message, TrafficDiagnosticsMessage):
-            mysql.put_traffic_diagnostics(message)
+    def _drain(rx_queue, message, max_batch, max_batch_delay=0) -> list:
+        """
+        Returns the message along with the ones received from the queue
+        within max_batch_delay seconds, up to max_batch entries
+
+        Queues offering get_many, such as faster-fifo's, hand out all
+        the waiting entries in one call.
+        """
+        get_many = getattr(rx_queue, "get_many", None)
+        deadline = time.monotonic() + max_batch_delay
+        batch = list()
+        messages = [message]
+        while True:
+            for message in messages:
+                if isinstance(message, list):
+                    batch.extend(message)
+                else:
+                    batch.append(message)
+
+            if len(batch) >= max_batch:
+                break
+
+            remaining = deadline - time.monotonic()
+            try:
+                if get_many is not None:
+                    messages = get_many(
+                        block=remaining > 0,
+                        timeout=max(remaining, 0),
+                        max_messages_to_get=max_batch - len(batch),
+                    )
+                elif remaining > 0:
+                    messages = [rx_queue.get(timeout=remaining)]
+                else:
+                    messages = [rx_queue.get_nowait()]
+            except queue.Empty:
+                break
+
+        return batch
+
+    @staticmethod
+    def _map_batch(mysql, batch):
+        """ Inserts a single message or a list of messages """
+        if not isinstance(batch, list):
+            batch = [batch]
+
+        mysql.put_batch(batch)
 
     def pool_on_data_received(self, n_workers=10):
-        """ Monitor inbound queue for messages to be stored in MySQL """
+        """
+        Monitor inbound queue for messages to be stored in MySQL
+
+        The observer remains the only reader of its queue. It hands the
+        batches out to a queue per worker, sharded by source address, so
+        the workers do not contend on a single queue and the messages
+        of a node are stored in order. The batches are sent as the rows
+        of MySQL.batch_rows, which pickle faster than the messages.
+        """
 
-        def work(storage_q, exit_signal, settings, timeout, logger):
+        def work(storage_q, exit_signal, settings, timeout, max_batch, logger):
 
             mysql = MySQL(
                 username=settings.username,
@@ -126,7 +182,7 @@ class MySQLObserver(StreamObserver):
 
             while not exit_signal.is_set():
                 try:
-                    message = storage_q.get(block=True, timeout=timeout)
+                    rows = storage_q.get(block=True, timeout=timeout)
                 except queue.Empty:
                     continue
                 except EOFError:
@@ -134,53 +190,130 @@ class MySQLObserver(StreamObserver):
                 except KeyboardInterrupt:
                     break
 
-                try:
-                    mysql.database.ping(True)
-                except MySQLdb.OperationalError:
-                    logger.exception(
-                        "MySQL worker %s: connection restart failed.", pid
-                    )
-                    mysql.close()
-                    while not exit_signal.is_set():
-                        try:
-                            mysql.connect(table_creation=False)
+                # merges the batches already waiting into one transaction
+                batches = [rows]
+                n_packets = len(rows[0])
+                while n_packets < max_batch:
+                    try:
+                        rows = storage_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    batches.append(rows)
+                    n_packets += len(rows[0])
+                packets, details = MySQL.merge_rows(batches)
+
+                # the connection is kept for the worker's lifetime and only
+                # reopened when a batch fails on it
+                while not exit_signal.is_set():
+                    try:
+                        mysql.put_rows(packets, details)
+                        break
+                    except MySQLdb.OperationalError as error:
+                        # data errors are operational errors as well, only
+                        # a lost connection is worth retrying the batch on
+                        if error.args[0] not in CONNECTION_LOST_ERRORS:
                             logger.exception(
-                                "MySQL worker %s: connection restart failed.",
-                                pid,
+                                "MySQL worker %s: could not store batch", pid
                             )
                             break
-                        except MySQLdb.Error:
-                            logger.exception(
-                                "MySQL worker %s: connection restart failed.",
-                                pid,
-                            )
-                            time.sleep(5)
 
-                if not exit_signal.is_set():
-                    try:
-                        MySQLObserver._map_message(mysql, message)
+                        logger.exception(
+                            "MySQL worker %s: connection lost, reconnecting",
+                            pid,
+                        )
+                        MySQLObserver._reconnect(mysql, exit_signal, logger)
                     except MySQLdb.Error:
                         logger.exception(
-                            "MySQL worker %s: connection restart failed.", pid
+                            "MySQL worker %s: could not store batch", pid
                         )
+                        break
 
             logger.warning("exiting MySQL worker %s", pid)
             return pid
 
+        shards = list()
         workers = dict()
-        for pseq in range(1, n_workers):
+        for pseq in range(n_workers):
+            shard = multiprocessing.Queue(maxsize=self.SHARD_QUEUE_SIZE)
+            shards.append(shard)
             workers[pseq] = multiprocessing.Process(
                 target=work,
                 args=(
-                    self.rx_queue,
+                    shard,
                     self.exit_signal,
                     self.settings,
                     self.timeout,
+                    self.max_batch,
                     self.logger,
                 ),
-            ).start()
+            )
+            workers[pseq].start()
 
-        self._wait_for_exit(workers=workers)
+        dispatcher = threading.Thread(
+            target=self._dispatch, args=(shards,), daemon=True
+        )
+        dispatcher.start()
+
+        self._wait_for_exit(workers=workers, dispatcher=dispatcher)
+        dispatcher.join(timeout=self.timeout)
+
+    def _dispatch(self, shards: list) -> None:
+        """ Splits the inbound batches among the worker queues """
+        n_shards = len(shards)
+
+        while not self.exit_signal.is_set():
+            try:
+                message = self.rx_queue.get(timeout=self.timeout, block=True)
+            except queue.Empty:
+                continue
+            except EOFError:
+                break
+
+            batches = [list() for _ in range(n_shards)]
+            for message in self._drain(
+                self.rx_queue, message, self.max_batch, self.max_batch_delay
+            ):
+                try:
+                    batches[message.source_address % n_shards].append(message)
+                except AttributeError:
+                    self.logger.exception("discarding message %s", message)
+
+            for shard, batch in zip(shards, batches):
+                if not batch:
+                    continue
+
+                # a malformed message must not stop the dispatch
+                # pylint: disable=locally-disabled, broad-except
+                try:
+                    rows = self.mysql.batch_rows(batch)
+                except Exception:
+                    self.logger.exception(
+                        "discarding batch of %s messages", len(batch)
+                    )
+                    continue
+
+                shard.put(rows)
+
+    @staticmethod
+    def _reconnect(mysql, exit_signal, logger, retry_delay=5):
+        """ Reopens the connection, retrying until it succeeds or exit """
+        backoff = 1
+        try:
+            mysql.close()
+        except MySQLdb.Error:
+            pass
+
+        while not exit_signal.is_set():
+            try:
+                mysql.connect(table_creation=False)
+                logger.info("MySQL worker %s: reconnected", os.getpid())
+                break
+            except MySQLdb.Error:
+                logger.exception(
+                    "MySQL worker %s: connection restart failed.", os.getpid()
+                )
+                exit_signal.wait(timeout=min(retry_delay, backoff))
+                backoff *= 2
 
     def run(self, **kwargs):
         """ Runs until asked to exit """
@@ -213,13 +346,23 @@ class MySQLObserver(StreamObserver):
 
         self.mysql.close()
 
-    def _wait_for_exit(self, workers: dict = None):
-        """ waits until the exit signal is set """
+    def _wait_for_exit(
+        self, workers: dict = None, dispatcher: threading.Thread = None
+    ):
+        """
+        waits until the exit signal is set
+
+        The signal is set when a worker or the dispatcher thread dies.
+        """
         while not self.exit_signal.is_set():
             self.logger.debug(
                 "MySQL is running (waiting for %s)", self.timeout
             )
-            time.sleep(self.timeout)
+            self.exit_signal.wait(timeout=self.timeout)
+            if dispatcher and not dispatcher.is_alive():
+                self.logger.error("Dispatcher is dead. Exiting")
+                self.exit_signal.set()
+                break
             if workers:
                 for seq, worker in workers.items():
                     if worker.is_alive():
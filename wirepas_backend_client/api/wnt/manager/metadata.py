@@ -58,9 +58,6 @@ class MetadataManager(Manager):
         self.messages["floorplan"] = FloorPlanMessages(
             self.logger, protocol_version
         )
-        self.messages["building"] = BuildingMessages(
-            self.logger, protocol_version
-        )
         self.messages["network"] = NetworkMessages(
             self.logger, protocol_version
         )
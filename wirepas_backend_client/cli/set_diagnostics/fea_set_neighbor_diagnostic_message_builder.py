@@ -1,6 +1,5 @@
 from enum import Enum
 from struct import pack
-import binascii
 
 
 class SetDiagnosticsIntervals(Enum):
@@ -58,7 +57,7 @@ class ControlMessage:
             self._sourceEndPoint,
             self._destinationEndPoint,
             self._nodeDestinationAddress,
-            binascii.hexlify(self._payload),
+            self._payload.hex(),
         )
 
     @property
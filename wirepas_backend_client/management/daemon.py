@@ -10,7 +10,6 @@
 """
 import logging
 import multiprocessing
-import time
 
 
 class Daemon(object):
@@ -24,6 +23,8 @@ class Daemon(object):
         join_timeout (int): amount of time wait for a process to join
         loop_cb (int): function to run while waiting for exit signal
         loop_kwargs (int): dictionary with loop function arguments
+        queue_factory (callable): creates the process queues, defaults
+            to the queue of the daemon's multiprocessing manager
 
     """
 
@@ -33,11 +34,17 @@ class Daemon(object):
         join_timeout: int = 1,
         loop_cb: callable = None,
         loop_kwargs: dict = None,
+        queue_factory: callable = None,
         logger=None,
     ):
         super(Daemon, self).__init__()
 
         self._manager = multiprocessing.Manager()
+        if queue_factory is None:
+            self.queue_factory = self._manager.Queue
+        else:
+            self.queue_factory = queue_factory
+
         self.start_signal = self._manager.Event()
         self.exit_signal = self._manager.Event()
         self.process = dict(main=self._process_details())
@@ -57,11 +64,16 @@ class Daemon(object):
 
         self.logger = logger or logging.getLogger(__name__)
 
-    def _process_details(self) -> dict:
+    def _process_details(
+        self, queue_maxsize: int = 0, queue_factory: callable = None
+    ) -> dict:
         """ Initialises the process entry dictionary """
+        if queue_factory is None:
+            queue_factory = self.queue_factory
+
         return dict(
-            tx_queue=self._manager.Queue(),
-            rx_queue=self._manager.Queue(),
+            tx_queue=queue_factory(maxsize=queue_maxsize),
+            rx_queue=queue_factory(maxsize=queue_maxsize),
             exit_signal=None,
             object=None,
             object_kwargs=None,
@@ -82,9 +94,9 @@ class Daemon(object):
         """ Creates and returns a new manager dictionary """
         return self._manager.dict(**kwargs)
 
-    def create_queue(self):
-        """ Creates and returns a new manager queue """
-        return self._manager.Queue()
+    def create_queue(self, maxsize: int = 0):
+        """ Creates and returns a new queue """
+        return self.queue_factory(maxsize=maxsize)
 
     def wait_loop(self):
         """ Default loop. Waits until an exit signal is given or the processes are dead"""
@@ -99,17 +111,21 @@ class Daemon(object):
                                 break
                     except (KeyError, AttributeError):
                         pass
-                time.sleep(self.heartbeat)
+                self.exit_signal.wait(timeout=self.heartbeat)
         except KeyboardInterrupt:
             pass
 
         if not self.exit_signal.is_set():
             self.exit_signal.set()
 
-    def init_process(self, name):
+    def init_process(
+        self, name, queue_maxsize: int = 0, queue_factory: callable = None
+    ):
         """ Initialises a process entry """
         if name not in self.process:
-            self.process[name] = self._process_details()
+            self.process[name] = self._process_details(
+                queue_maxsize, queue_factory
+            )
             self.logger.debug("Creating message queues for %s", name)
         else:
             self.logger.debug("Message queues already created")
@@ -123,10 +139,17 @@ class Daemon(object):
         send_to=None,
         storage=False,
         storage_name="mysql",
+        queue_maxsize=0,
+        queue_factory=None,
     ):
-        """ Creates the object which will interact with the process """
+        """
+        Creates the object which will interact with the process
+
+        A non zero queue_maxsize bounds the process' own tx and rx queues,
+        which are created with queue_factory when one is given.
+        """
 
-        self.init_process(name)
+        self.init_process(name, queue_maxsize, queue_factory)
 
         if "start_signal" not in kwargs:
             kwargs["start_signal"] = self.start_signal
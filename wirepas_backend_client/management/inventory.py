@@ -27,7 +27,9 @@ class Inventory(object):
     Attributes:
         _nodes(set): contains a set of nodes
         _index(set): dictionary which stores all the node events
-        _target_nodes (set): which nodes to observe (None if not known)
+        _target_nodes (frozenset): which nodes to observe
+        _missing_nodes (set): target nodes not observed yet
+        _missing_otap_nodes (set): target nodes not otaped yet
         _target_otap_sequence (int): scratchpad sequence to observe in all nodes
         _target_frequency (int) : how many times a given node should be seen
         _start_delay (float) : how long to delay the counting
@@ -57,9 +59,11 @@ class Inventory(object):
     ) -> "Inventory":
         super(Inventory, self).__init__()
 
-        self._target_nodes = target_nodes
-        if self._target_nodes is None:
-            self._target_nodes = set()
+        # keeps a private copy to avoid sharing the caller's set
+        if target_nodes is None:
+            self._target_nodes = frozenset()
+        else:
+            self._target_nodes = frozenset(target_nodes)
 
         self._target_otap_sequence = target_otap_sequence
 
@@ -79,6 +83,9 @@ class Inventory(object):
         self._finish = None
         self._elapsed = None
         self._otaped_nodes = set()
+        self._missing_nodes = set(self._target_nodes)
+        self._missing_otap_nodes = set(self._target_nodes)
+        self._below_frequency = self._unseen_below_frequency()
         self._runtime = None
 
         self.logger = logger or logging.getLogger(__name__)
@@ -127,6 +134,10 @@ class Inventory(object):
         """ Clean up the internal variables to start over """
         self._nodes = set()  # unique list of nodes
         self._index = dict()
+        self._otaped_nodes = set()
+        self._missing_nodes = set(self._target_nodes)
+        self._missing_otap_nodes = set(self._target_nodes)
+        self._below_frequency = self._unseen_below_frequency()
 
         self._start = None
         self._deadline = None
@@ -169,6 +180,7 @@ class Inventory(object):
 
         """
         self._nodes.add(node_address)
+        self._missing_nodes.discard(node_address)
 
         otap_min = None
         otap_max = None
@@ -177,45 +189,78 @@ class Inventory(object):
             otap_min = min(otap_sequence)
             otap_max = max(otap_sequence)
 
+        has_rss = any(rss)
+
         # creates an event
-        if otap_min and otap_max and any(rss):
+        if otap_min and otap_max and has_rss:
             event = dict(
                 rss=rss,
                 otap=otap_sequence,
-                otap_max=max(otap_sequence),
-                otap_min=min(otap_sequence),
+                otap_max=otap_max,
+                otap_min=otap_min,
             )
-        elif any(rss):
+        elif has_rss:
             event = dict(rss=rss)
-
         elif any(otap_sequence):
             event = dict(
-                otap=otap_sequence,
-                otap_max=max(otap_sequence),
-                otap_min=min(otap_sequence),
+                otap=otap_sequence, otap_max=otap_max, otap_min=otap_min
             )
         else:
             event = dict(rss=rss, otap=otap_sequence)
 
-        # add nodes to index
-        try:
-            self._index[node_address]["count"] += 1
-            self._index[node_address]["last_seen"] = timestamp
-            self._index[node_address]["events"].append(event)
+        # tracks if the node's latest event has reached the otap target
+        target_otap_sequence = self._target_otap_sequence
+        if target_otap_sequence is not None:
+            if (
+                event.get("otap_min") == target_otap_sequence
+                or event.get("otap_max") == target_otap_sequence
+            ):
+                self._otaped_nodes.add(node_address)
+                self._missing_otap_nodes.discard(node_address)
+            else:
+                self._otaped_nodes.discard(node_address)
+                if node_address in self._target_nodes:
+                    self._missing_otap_nodes.add(node_address)
 
-        except KeyError:
-            self._index[node_address] = dict(
+        # add nodes to index
+        entry = self._index.get(node_address)
+        if entry is not None:
+            entry["count"] += 1
+            entry["last_seen"] = timestamp
+            entry["events"].append(event)
+        else:
+            entry = self._index[node_address] = dict(
                 last_seen=timestamp, events=[event], count=1
             )
-            self.logger.debug(
-                "adding node: {0} / {1}".format(node_address, event),
-                dict(sequence=self.sequence),
-            )
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "adding node: {0} / {1}".format(node_address, event),
+                    dict(sequence=self.sequence),
+                )
+
+        # tracks the target nodes yet to reach the frequency target, with
+        # the same value as frequency()
+        if node_address in self._target_nodes:
+            if target_otap_sequence:
+                value = event.get("otap_max")
+            else:
+                value = entry["count"]
+
+            if value is not None and value >= self._target_frequency:
+                self._below_frequency.discard(node_address)
+            else:
+                self._below_frequency.add(node_address)
 
     def remove(self, node_address) -> None:
         """ Removes a node from the known inventory """
         self.nodes.remove(node_address)
         del self._index[node_address]
+        self._otaped_nodes.discard(node_address)
+        if node_address in self._target_nodes:
+            self._missing_nodes.add(node_address)
+            self._missing_otap_nodes.add(node_address)
+            if 0 < self._target_frequency:
+                self._below_frequency.add(node_address)
 
     def is_out_of_time(self):
         """ Evaluates if the time has run out for the run """
@@ -235,13 +280,13 @@ class Inventory(object):
         if not self._target_nodes or self._target_frequency < math.inf:
             return False
 
-        if self._nodes.issuperset(self._target_nodes):
+        if not self._missing_nodes:
             if not self._target_otap_sequence:
                 return True
         else:
             self.logger.critical(
                 "elapsed {} - missing {}".format(
-                    self.elapsed, self.nodes ^ self._target_nodes
+                    self.elapsed, self._missing_nodes
                 ),
                 dict(sequence=self.sequence),
             )
@@ -257,10 +302,10 @@ class Inventory(object):
         if not self._target_nodes or self._target_otap_sequence is None:
             return False
 
-        if not self.otaped_nodes.issuperset(self._target_nodes):
+        if self._missing_otap_nodes:
             self.logger.critical(
                 "elapsed {} - otap missing {}".format(
-                    self.elapsed, self.otaped_nodes ^ self._target_nodes
+                    self.elapsed, self._missing_otap_nodes
                 ),
                 dict(sequence=self.sequence),
             )
@@ -276,13 +321,49 @@ class Inventory(object):
         if not self._target_nodes or self._target_frequency is None:
             return False
 
-        frequency = self.frequency()
-        if self._target_nodes:
-            frequency = self._filter_dict(frequency)
+        return not self._below_frequency
 
-        return all(
-            map(lambda x: x >= self._target_frequency, frequency.values())
-        )
+    def _unseen_below_frequency(self) -> set:
+        """
+        Returns the target nodes below the frequency target before they
+        are seen, as frequency() counts them as 0
+        """
+        if self._target_frequency is not None and 0 < self._target_frequency:
+            return set(self._target_nodes)
+        return set()
+
+    def completion_criteria(self) -> list:
+        """
+        Returns the (predicate, description) pairs that can end the
+        inventory, leaving out those that can never be met with the
+        current targets.
+        """
+        criteria = list()
+        if not self._target_nodes:
+            return criteria
+
+        if (
+            self._target_frequency == math.inf
+            and not self._target_otap_sequence
+        ):
+            criteria.append(
+                (self.is_complete, "inventory completed for all target nodes")
+            )
+
+        if self._target_otap_sequence is not None:
+            criteria.append(
+                (self.is_otaped, "inventory completed for all otap targets")
+            )
+
+        if self._target_frequency < math.inf:
+            criteria.append(
+                (
+                    self.is_frequency_reached,
+                    "inventory completed for frequency target",
+                )
+            )
+
+        return criteria
 
     def _filter_dict(self, d: dict):
         """ Returns a dictionary that has keys occurring in _target_nodes """
@@ -332,18 +413,6 @@ class Inventory(object):
     @property
     def otaped_nodes(self):
         """ Provides the set of nodes that have been ottaped to the target """
-        self._otaped_nodes = set()
-        for node_address, details in self._index.items():
-            try:
-                if (
-                    details["events"][-1]["otap_min"]
-                    == self._target_otap_sequence
-                    or details["events"][-1]["otap_max"]
-                    == self._target_otap_sequence
-                ):
-                    self._otaped_nodes.add(node_address)
-            except KeyError:
-                pass
         return self._otaped_nodes
 
     def frequency(self):
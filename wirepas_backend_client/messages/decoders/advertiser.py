@@ -11,11 +11,23 @@
 """
 # pylint: disable=locally-disabled, logging-format-interpolation
 
+import itertools
+import operator
+import struct
 
 from .generic import GenericMessage
 from ..types import ApplicationTypes
-from ... import tools
-import struct
+
+# the APDU header: type and reserved field
+ADV_HEADER = struct.Struct("<B B")
+
+# a measurement is read as the low 16 bits of its address, the remaining
+# high byte(s) and the value byte
+ADV_MEASUREMENT_3BYTE = struct.Struct("<H B B")
+ADV_MEASUREMENT_4BYTE = struct.Struct("<H H B")
+
+# the rss, otap and time of an apdu["adv"] entry
+ADV_DETAILS = operator.itemgetter("rss", "otap", "time")
 
 
 class AdvertiserMessage(GenericMessage):
@@ -29,13 +41,15 @@ class AdvertiserMessage(GenericMessage):
         _destination_endpoint (int): Advertiser destination endpoint
         _message_type_rss (int): APDU's RSS message type
         _message_type_otap (int): APDU's OTAP message type
-        _message_counter (int): How many messages have been seen so far
+        _counter (itertools.count): Hands out the message sequence numbers
+        message_counter (int): How many messages have been seen so far
 
         timestamp (int): Message received time
         type (int): Type of application message (ApplicationTypes)
         apdu["adv"] (dict): Dictionary containing the apdu contents
         apdu["adv_type"] (int): APDU type
         apdu["adv_reserved_field"] (int): APDU reserved field
+        advertisers (list): (address, rss, otap, time) tuple per advertiser
         index (int): Message sequence number (as observed from the client side)
     """
 
@@ -44,6 +58,7 @@ class AdvertiserMessage(GenericMessage):
     source_endpoint = 200
     destination_endpoint = 200
 
+    _counter = itertools.count(1)
     message_counter = 0
     message_type_rss = 2
     message_type_otap = 3
@@ -64,13 +79,23 @@ class AdvertiserMessage(GenericMessage):
         self.decode()
 
     def count(self):
-        """ Increases the message counter """
-        AdvertiserMessage.message_counter = (
-            AdvertiserMessage.message_counter + 1
-        )
-        self.index = self.message_counter
+        """
+        Increases the message counter
+
+        The sequence number is drawn from an itertools.count, whose
+        increment is atomic, so messages decoded from concurrent
+        callbacks do not share an index.
+        """
+        self.index = next(AdvertiserMessage._counter)
+        AdvertiserMessage.message_counter = self.index
         return self.index
 
+    @classmethod
+    def reset_count(cls):
+        """ Restarts the message counter """
+        cls._counter = itertools.count(1)
+        cls.message_counter = 0
+
     def decode(self) -> None:
         """
         Unpacks the advertiser data from the APDU to the inner
@@ -87,58 +112,73 @@ class AdvertiserMessage(GenericMessage):
 
         super().decode()
 
-        s_header = struct.Struct("<B B")
-
-        header = s_header.unpack(self.data_payload[0:2])
+        header = ADV_HEADER.unpack_from(self.data_payload)
 
         self.apdu["adv_type"] = header[0] & 0x7F
         self.apdu["adv_reserved_field"] = header[1]
         address_4byte = header[0] >> 7
         if address_4byte == 1:
-            s_advertisement = struct.Struct("<B B B B B")
-            address_len = 4
+            s_advertisement = ADV_MEASUREMENT_4BYTE
         else:
-            s_advertisement = struct.Struct("<B B B B")
-            address_len = 3
+            s_advertisement = ADV_MEASUREMENT_3BYTE
 
         # switch on type
-        body = self.data_payload[2:]
-        for chunk in tools.chunker(body, s_advertisement.size):
-            if len(chunk) < (address_len + 1):
-                continue
+        adv_type = self.apdu["adv_type"]
+        is_rss = adv_type == AdvertiserMessage.message_type_rss
+        is_otap = adv_type == AdvertiserMessage.message_type_otap
+        adv = self.apdu["adv"]
+        timestamp = self.timestamp
 
-            values = s_advertisement.unpack(chunk)
+        # the measurements are read in place, without copying the body,
+        # and a trailing partial measurement is ignored
+        body = memoryview(self.data_payload)[2:]
+        end = len(body) - len(body) % s_advertisement.size
 
-            address = values[0]
-            address = address | (values[1] << 8)
-            address = address | (values[2] << 16)
-            if address_len == 4:
-                address = address | (values[3] << 24)
+        for low, high, value in s_advertisement.iter_unpack(body[:end]):
+            address = low | (high << 16)
 
             rss = None
             otap = None
-            value = values[-1]
 
-            if self.apdu["adv_type"] == AdvertiserMessage.message_type_rss:
-                rss = values[-1] / 2 - 127
+            if is_rss:
+                rss = value / 2 - 127
                 value = rss
-            elif self.apdu["adv_type"] == AdvertiserMessage.message_type_otap:
-                otap = values[-1]
-                value = otap
+            elif is_otap:
+                otap = value
 
-            if address not in self.apdu["adv"]:
-                self.apdu["adv"][address] = dict(
+            try:
+                details = adv[address]
+            except KeyError:
+                details = adv[address] = dict(
                     time=None, rss=list(), otap=list(), value=list()
                 )
 
-            self.apdu["adv"][address]["time"] = self.timestamp
+            details["time"] = timestamp
 
             if rss:
-                self.apdu["adv"][address]["rss"].append(rss)
+                details["rss"].append(rss)
             elif otap:
-                self.apdu["adv"][address]["otap"].append(otap)
+                details["otap"].append(otap)
             else:
-                self.apdu["adv"][address]["value"].append(value)
+                details["value"].append(value)
+
+    @property
+    def advertisers(self) -> list:
+        """ Builds the (address, rss, otap, time) tuple per advertiser """
+        return list(self.iter_advertiser_tuples())
+
+    def iter_advertiser_tuples(self):
+        """
+        Iterates over the decoded advertisers as
+        (address, rss, otap, time) tuples
+
+        The tuples are read from apdu["adv"] on demand, so that messages
+        carry and pickle only one copy of their measurements.
+        """
+        return (
+            (address,) + ADV_DETAILS(details)
+            for address, details in self.apdu["adv"].items()
+        )
 
     def _apdu_serialization(self):
         """ Standard apdu serialization. """
@@ -10,14 +10,21 @@
         See file LICENSE for full license details.
 """
 
+import json
 import queue
 import random
 import datetime
-import importlib
+import time
+import logging
 import multiprocessing
 
 import pandas
 
+try:
+    import faster_fifo
+except ImportError:
+    faster_fifo = None
+
 from wirepas_backend_client.messages import AdvertiserMessage
 from wirepas_backend_client.tools import ParserHelper, LoggerHelper
 from wirepas_backend_client.api import MySQLSettings, MySQLObserver
@@ -25,6 +32,10 @@ from wirepas_backend_client.api import MQTTObserver, MQTTSettings
 from wirepas_backend_client.management import Daemon, Inventory
 from wirepas_backend_client.test import TestManager
 
+# size of the faster-fifo queues, which are bounded in bytes
+FIFO_SIZE_BYTES = 1 << 24
+FIFO_ENTRY_BYTES = 1 << 14
+
 
 class AdvertiserManager(TestManager):
     """
@@ -40,6 +51,12 @@ class AdvertiserManager(TestManager):
         duration: maximum duration of the test
         logger: package logger
 
+    Messages are read from the rx queue in bursts of up to rx_burst_size
+    entries and the inventory targets are evaluated once per burst.
+
+    Messages sent to the storage queue are grouped in lists of up to
+    storage_batch_size entries or storage_batch_interval seconds.
+
     """
 
     # pylint: disable=locally-disabled, logging-format-interpolation, logging-too-many-args
@@ -80,9 +97,16 @@ class AdvertiserManager(TestManager):
         )
 
         self._test_sequence_number = 0
-        self._timeout = 1
+        self._timeout = 10
         self._tasks = list()
 
+        self.rx_burst_size = 64
+        self.storage_batch_size = 64
+        self.storage_batch_interval = 0.25
+        self._storage_batch = list()
+        self._storage_full = False
+        self._last_flush = time.monotonic()
+
     def test_inventory(self, test_sequence_number=0) -> None:
         """
         Inventory test
@@ -105,66 +129,77 @@ class AdvertiserManager(TestManager):
             dict(sequence=self._test_sequence_number),
         )
 
-        AdvertiserMessage.message_counter = 0
-        empty_counter = 0
+        AdvertiserMessage.reset_count()
+        deadline = time.monotonic() + self.inventory.until(
+            self.inventory.deadline
+        )
 
-        while not self.exit_signal.is_set():
+        # local bindings avoid attribute lookups on every message
+        monotonic = time.monotonic
+        rx_get = self.rx_queue.get
+        exit_set = self.exit_signal.is_set
+        inventory = self.inventory
+        inventory_add = inventory.add
+        criteria = inventory.completion_criteria()
+        timeout = self._timeout
+        burst_size = self.rx_burst_size
+        log_messages = self.logger.isEnabledFor(logging.INFO)
+
+        while not exit_set():
+            time_left = deadline - monotonic()
+            if time_left <= 0:
+                break
+
+            # blocks until a message arrives; the timeout only bounds how
+            # long the queue can stay silent before logging it
             try:
-                message = self.rx_queue.get(timeout=self._timeout, block=True)
-                empty_counter = 0
+                message = rx_get(timeout=min(time_left, timeout), block=True)
             except queue.Empty:
-                empty_counter = empty_counter + 1
-                if empty_counter > 10:
+                self._flush_storage()
+                if monotonic() < deadline:
                     self.logger.debug(
-                        "Advertiser messages " "are not being received"
+                        "Advertiser messages are not being received"
                     )
-                    empty_counter = 0
-
-                if self.inventory.is_out_of_time():
-                    break
-                else:
-                    continue
-
-            self.logger.info(message.serialize())
+                continue
 
-            if self.storage_queue:
-                self.storage_queue.put(message)
-                if self.storage_queue.qsize() > 100:
-                    self.logger.critical("storage queue is too big")
-
-            # create map of apdu["adv"]
-            for node_address, details in message.apdu["adv"].items():
-                self.inventory.add(
-                    node_address=node_address,
-                    rss=details["rss"],
-                    otap_sequence=details["otap"],
-                    timestamp=details["time"],
-                )
+            # drains whatever is already waiting in the queue
+            burst = [message]
+            try:
+                while len(burst) < burst_size:
+                    burst.append(rx_get(block=False))
+            except queue.Empty:
+                pass
 
-            if self.inventory.is_out_of_time():
-                break
+            for message in burst:
+                if log_messages:
+                    self.logger.info(message.serialize())
 
-            if self.inventory.is_complete():
-                self.logger.info(
-                    "inventory completed for all target nodes",
-                    dict(sequence=self._test_sequence_number),
-                )
-                break
+                for advertiser in message.iter_advertiser_tuples():
+                    inventory_add(*advertiser)
 
-            if self.inventory.is_otaped():
-                self.logger.info(
-                    "inventory completed for all otap targets",
-                    dict(sequence=self._test_sequence_number),
-                )
+            if self.storage_queue:
+                self._storage_batch.extend(burst)
+                if (
+                    len(self._storage_batch) >= self.storage_batch_size
+                    or monotonic() - self._last_flush
+                    > self.storage_batch_interval
+                ):
+                    self._flush_storage()
+
+            if monotonic() >= deadline:
                 break
 
-            if self.inventory.is_frequency_reached():
+            completed = next(
+                (reason for criterion, reason in criteria if criterion()),
+                None,
+            )
+            if completed:
                 self.logger.info(
-                    "inventory completed for frequency target",
-                    dict(sequence=self._test_sequence_number),
+                    completed, dict(sequence=self._test_sequence_number)
                 )
                 break
 
+        self._flush_storage()
         self.inventory.finish()
         report = self.report()
         self.tx_queue.put(report)
@@ -184,6 +219,44 @@ class AdvertiserManager(TestManager):
 
         self.logger.info(record, dict(sequence=self._test_sequence_number))
 
+    def _store(self, message) -> None:
+        """
+        Puts a message in the storage queue. When the queue is full,
+        the oldest entries are dropped until the new one fits.
+        """
+        try:
+            self.storage_queue.put(message, block=False)
+            self._storage_full = False
+            return
+        except queue.Full:
+            # only logs when the queue becomes full
+            if not self._storage_full:
+                self.logger.critical("storage queue is too big")
+                self._storage_full = True
+
+        # a queue sized in bytes may need more than one entry dropped
+        while True:
+            try:
+                self.storage_queue.get_nowait()
+            except queue.Empty:
+                self.logger.error("storage entry does not fit in the queue")
+                return
+
+            try:
+                self.storage_queue.put(message, block=False)
+                return
+            except queue.Full:
+                continue
+
+    def _flush_storage(self) -> None:
+        """ Sends the pending storage batch as a single queue entry """
+        self._last_flush = time.monotonic()
+        if not self._storage_batch:
+            return
+
+        self._store(self._storage_batch)
+        self._storage_batch = list()
+
     def report(self) -> dict:
         """
         Returns a string with the gathered results.
@@ -205,23 +278,29 @@ class AdvertiserManager(TestManager):
         return msg
 
 
+def _report_value(obj):
+    """
+    Serializes the report values json does not handle
+
+    The inventory's UTC datetimes are written as epoch milliseconds, as
+    DataFrame.to_json did, and the sets of nodes as lists.
+    """
+    if isinstance(obj, datetime.datetime):
+        return (obj - datetime.datetime(1970, 1, 1)) // datetime.timedelta(
+            milliseconds=1
+        )
+
+    return list(obj)
+
+
 def fetch_report(
     args, rx_queue, timeout, report_output, number_of_runs, exit_signal, logger
 ):
-    """ Reporting loop executed between test runs """
-    reports = {}
-    for run in range(0, number_of_runs):
-        try:
-            report = rx_queue.get(timeout=timeout, block=True)
-            reports[run] = report
-        except queue.Empty:
-            report = None
-            logger.warning("timed out waiting for report")
-
-        if exit_signal.is_set():
-            raise RuntimeError
+    """
+    Reporting loop executed between test runs
 
-    df = pandas.DataFrame.from_dict(reports)
+    The reports are written to the output file as JSON lines.
+    """
     if args.output_time:
         filepath = "{}_{}".format(
             datetime.datetime.now().isoformat(), args.output
@@ -229,7 +308,34 @@ def fetch_report(
     else:
         filepath = "{}".format(args.output)
 
-    df.to_json(filepath)
+    # one JSON line per run, written as soon as its report arrives
+    with open(filepath, "w") as output:
+        for run in range(0, number_of_runs):
+            try:
+                report = rx_queue.get(timeout=timeout, block=True)
+            except queue.Empty:
+                logger.warning("timed out waiting for report")
+            else:
+                report["run"] = run
+                output.write(json.dumps(report, default=_report_value))
+                output.write("\n")
+                output.flush()
+
+            if exit_signal.is_set():
+                raise RuntimeError
+
+
+def fifo_queue(maxsize=0, max_size_bytes=FIFO_SIZE_BYTES):
+    """
+    Creates a faster-fifo queue, which is sized in bytes rather than in
+    number of entries
+
+    A non zero maxsize, given in entries, is converted to bytes by
+    assuming entries of up to FIFO_ENTRY_BYTES each.
+    """
+    if maxsize:
+        max_size_bytes = maxsize * FIFO_ENTRY_BYTES
+    return faster_fifo.Queue(max_size_bytes=max_size_bytes)
 
 
 def main(args, logger):
@@ -241,12 +347,14 @@ def main(args, logger):
     mysql_settings = MySQLSettings(args)
     mqtt_settings = MQTTSettings(args)
 
-    if mysql_settings.sanity():
-        mysql_available = True
+    storage_enabled = mysql_settings.sanity()
+    if storage_enabled:
         daemon.build(
             __STORAGE_ENGINE__,
             MySQLObserver,
             dict(mysql_settings=mysql_settings),
+            queue_maxsize=__STORAGE_QUEUE_SIZE__,
+            queue_factory=fifo_queue if faster_fifo else None,
         )
 
         daemon.set_run(
@@ -255,7 +363,6 @@ def main(args, logger):
             task_as_daemon=False,
         )
     else:
-        mysql_available = False
         logger.info("Skipping Storage module")
 
     if mqtt_settings.sanity():
@@ -268,6 +375,7 @@ def main(args, logger):
                 logger=logger,
                 allowed_endpoints=set([AdvertiserMessage.source_endpoint]),
             ),
+            queue_factory=fifo_queue if faster_fifo else None,
         )
 
         topic = "gw-event/received_data/{gw_id}/{sink_id}/{network_id}/{source_endpoint}/{destination_endpoint}".format(
@@ -297,7 +405,7 @@ def main(args, logger):
                 duration=args.duration,
             ),
             receive_from="mqtt",
-            storage=mysql_available,
+            storage=storage_enabled,
             storage_name=__STORAGE_ENGINE__,
         )
 
@@ -328,8 +436,8 @@ def main(args, logger):
 
 if __name__ == "__main__":
 
-    __MYSQL_ENABLED__ = importlib.util.find_spec("MySQLdb")
     __STORAGE_ENGINE__ = "mysql"
+    __STORAGE_QUEUE_SIZE__ = 1024
     __TEST_NAME__ = "test_advertiser"
 
     PARSE = ParserHelper(description="KPI ADV arguments")
@@ -349,10 +457,14 @@ if __name__ == "__main__":
 
     # pylint: disable=locally-disabled, no-member
     try:
-        nodes = set({int(line) for line in open(SETTINGS.nodes, "r")})
+        nodes = pandas.read_csv(SETTINGS.nodes, header=None, dtype="uint32")
+        nodes = frozenset(nodes[0].tolist())
     except FileNotFoundError:
         LOGGER.warning("Could not find nodes file")
-        nodes = set()
+        nodes = frozenset()
+    except pandas.errors.EmptyDataError:
+        LOGGER.warning("Nodes file is empty")
+        nodes = frozenset()
 
     SETTINGS.target_nodes = nodes
     if SETTINGS.jitter_minimum > SETTINGS.jitter_maximum:
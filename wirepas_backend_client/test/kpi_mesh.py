@@ -10,6 +10,8 @@
 """
 
 import os
+import threading
+import time
 
 from enum import Enum
 
@@ -33,7 +35,15 @@ run_config: RunConfiguration = RunConfiguration.run_normally
 
 
 class MultiMessageMqttObserver(MQTTObserver):
-    """ MultiMessageMqttObserver """
+    """
+    MultiMessageMqttObserver
+
+    Data messages are sent to the storage queue in lists of up to
+    storage_batch_size entries or storage_batch_interval seconds. A
+    partial list is flushed on every turn of the MQTT loop, which waits
+    for requests at most storage_batch_interval seconds, so no message
+    is held back for longer than that on a quiet network.
+    """
 
     # pylint: disable=locally-disabled, too-many-instance-attributes
 
@@ -43,6 +53,12 @@ class MultiMessageMqttObserver(MQTTObserver):
         self.storage_queue = kwargs.pop("storage_queue", None)
         super(MultiMessageMqttObserver, self).__init__(**kwargs)
 
+        self.storage_batch_size = 64
+        self.storage_batch_interval = 0.25
+        self._storage_batch = list()
+        self._storage_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
         self.network_id = kwargs["mqtt_settings"].network_id
         self.sink_id = kwargs["mqtt_settings"].sink_id
         self.gateway_id = kwargs["mqtt_settings"].gateway_id
@@ -95,7 +111,7 @@ class MultiMessageMqttObserver(MQTTObserver):
                 # In KPI testing all received data packages are directed to
                 # storage
                 if self.storage_queue is not None:
-                    self.storage_queue.put(message)
+                    self._stage(message)
             else:
                 self.logger.debug(
                     "waiting for start signal, received mqtt data ignored"
@@ -103,6 +119,40 @@ class MultiMessageMqttObserver(MQTTObserver):
 
         return on_data_received
 
+    def _stage(self, message) -> None:
+        """ Adds a message to the storage batch, sending it when due """
+        with self._storage_lock:
+            self._storage_batch.append(message)
+            if (
+                len(self._storage_batch) >= self.storage_batch_size
+                or time.monotonic() - self._last_flush
+                >= self.storage_batch_interval
+            ):
+                self._flush_storage()
+
+    def _flush_storage(self) -> None:
+        """
+        Sends the storage batch as a single queue entry, with the
+        storage lock held so that the batches keep their order
+        """
+        self._last_flush = time.monotonic()
+        if self._storage_batch:
+            self.storage_queue.put(self._storage_batch)
+            self._storage_batch = list()
+
+    def send_data(self, timeout, block):
+        """
+        Flushes the storage batch before serving the requests, waiting
+        for them no longer than the storage batch interval
+        """
+        if self.storage_queue is not None:
+            with self._storage_lock:
+                self._flush_storage()
+            if timeout is None or timeout > self.storage_batch_interval:
+                timeout = self.storage_batch_interval
+
+        return super().send_data(timeout=timeout, block=block)
+
     def generate_gw_status_cb(self) -> callable:
         """ Returns a callback to process gw status events """
 
@@ -29,9 +29,7 @@ class Settings:
         super(Settings, self).__init__()
 
         self.debug_level = None
-
-        for k, v in settings.items():
-            self.__dict__[k] = v
+        self.__dict__.update(settings.items())
 
     def items(self):
         """ returns the internal dictionary items """
@@ -54,13 +52,13 @@ class Settings:
         return is_valid
 
     def to_dict(self):
-        """ Returns the objects internal dictionary """
-        return self.__dict__
+        """ Returns a shallow copy of the objects internal dictionary """
+        return self.__dict__.copy()
 
     def _helper_str(self, key_filter=None) -> str:
-        mystr = ""
+        lines = list()
         for key, value in self.__dict__.items():
-            if "password" in "key":
+            if "password" in key:
                 if value is not None:
                     value = "password_is_set"
             if key_filter is not None:
@@ -70,8 +68,8 @@ class Settings:
             if key in self._MANDATORY_FIELDS:
                 hint = "required"
 
-            mystr += "{}: {} ({})\n".format(key, value, hint)
-        return mystr
+            lines.append("{}: {} ({})\n".format(key, value, hint))
+        return "".join(lines)
 
     def __str__(self) -> str:
         return self._helper_str(key_filter=None)
@@ -468,7 +466,7 @@ class ParserHelper:
             "--output",
             default=os.environ.get("WM_BCLI_TEST_OUTPUT", None),
             type=str,
-            help="file where to ouput the report",
+            help="file where to ouput the report (JSON lines)",
         )
 
         self.test.add_argument(
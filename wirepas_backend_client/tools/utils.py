@@ -10,10 +10,10 @@
         See file LICENSE for full license details.
 """
 
-import binascii
 import datetime
 import json
 import threading
+import time
 
 from google.protobuf import json_format
 
@@ -74,7 +74,7 @@ class JsonSerializer(json.JSONEncoder):
             return obj.isoformat()
 
         if isinstance(obj, (bytearray, bytes)):
-            return binascii.hexlify(obj)
+            return obj.hex()
 
         if isinstance(obj, set):
             return str(obj)
@@ -179,6 +179,22 @@ class Signal:
 
         return ret
 
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Waits until the event is set or the timeout expires
+
+        An inner boolean can not be waited on, in which case it sleeps
+        for the whole timeout.
+        """
+        try:
+            ret = self.signal.wait(timeout)
+        except AttributeError:
+            if not self.signal and timeout:
+                time.sleep(timeout)
+            ret = self.is_set()
+
+        return ret
+
 
 def chunker(seq, size) -> list():
     """